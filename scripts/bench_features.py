@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# Log-mel feature time per dictation: recompute-per-decode (what mlx_whisper.transcribe does with
+# raw audio, including its 30 s zero padding) vs the incremental StreamingLogMel buffer.
+# Simulates 100 ms chunks, a partial decode of the newest 800 ms every 650 ms, and one final decode.
+#
+# Usage: python3 scripts/bench_features.py [--seconds 5 15 30] [--n-mels 128]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "backend"))
+
+from log_mel import HOP_LENGTH, N_FFT, N_FRAMES, SAMPLE_RATE, StreamingLogMel, _window, mel_filters, normalize_log_mel  # noqa: E402
+
+
+def recompute_log_mel(audio: np.ndarray, n_mels: int) -> np.ndarray:
+    padded = np.pad(np.pad(audio, (0, N_FRAMES * HOP_LENGTH)), (N_FFT // 2, N_FFT // 2), mode="reflect")
+    n = 1 + (padded.shape[0] - N_FFT) // HOP_LENGTH
+    frames = np.lib.stride_tricks.sliding_window_view(padded, N_FFT)[::HOP_LENGTH][:n]
+    spectrum = np.fft.rfft(frames * _window, axis=1)[:-1]
+    power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+    raw = np.log10(np.maximum(power @ mel_filters(n_mels).T, 1e-10))
+    return normalize_log_mel(raw)[:N_FRAMES]
+
+
+def simulate(seconds: float, n_mels: int):
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 0.1).astype(np.float32)
+    chunk = SAMPLE_RATE // 10
+    window = int(0.8 * SAMPLE_RATE)
+    every = int(0.65 * SAMPLE_RATE)
+
+    recompute_s = 0.0
+    incremental_s = 0.0
+    stream = StreamingLogMel(n_mels)
+    next_partial = window
+    for end in range(chunk, audio.shape[0] + 1, chunk):
+        current = audio[:end]
+        t0 = time.perf_counter()
+        stream.update(current)
+        incremental_s += time.perf_counter() - t0
+
+        if end >= next_partial:
+            start = end - window
+            t0 = time.perf_counter()
+            recompute_log_mel(current[start:], n_mels)
+            recompute_s += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            stream.features_for_spans(current, [(start, window)])
+            incremental_s += time.perf_counter() - t0
+            next_partial = end + every
+
+    t0 = time.perf_counter()
+    reference = recompute_log_mel(audio, n_mels)
+    recompute_s += time.perf_counter() - t0
+    t0 = time.perf_counter()
+    final = stream.features_for_spans(audio, [(0, audio.shape[0])])
+    incremental_s += time.perf_counter() - t0
+
+    max_err = float(np.abs(final - reference).max())
+    return recompute_s * 1000.0, incremental_s * 1000.0, max_err
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5.0, 15.0, 30.0])
+    parser.add_argument("--n-mels", type=int, default=128)
+    args = parser.parse_args()
+
+    for seconds in args.seconds:
+        recompute_ms, incremental_ms, max_err = simulate(seconds, args.n_mels)
+        print(
+            f"{seconds:5.1f}s dictation  recompute={recompute_ms:8.1f}ms  incremental={incremental_ms:7.1f}ms  "
+            f"speedup={recompute_ms / max(incremental_ms, 1e-6):5.1f}x  final_max_abs_err={max_err:.2e}"
+        )
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Per-chunk transport overhead: loopback TCP + base64 JSON vs Unix socket + shared-memory ring.
+# Measures the round trip of one audio.chunk message including the server-side work
+# needed to turn it into float32 samples (the part AudioService does before resampling).
+#
+# Usage: python3 scripts/bench_transport.py [--chunks 2000] [--chunk-ms 100] [--sample-rate 48000]
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from aiohttp import ClientSession, UnixConnector, web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "backend"))
+
+from shm_ring import SharedAudioRing  # noqa: E402
+
+
+def _to_float(views):
+    parts = [np.frombuffer(v, dtype=np.int16).astype(np.float32) / 32768.0 for v in views]
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+def build_app(state):
+    async def handle_stream(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            payload = json.loads(msg.data)
+            if payload["type"] == "session.start":
+                if payload.get("shm_name"):
+                    # Client and server share this process, so reuse the client's mapping instead
+                    # of attaching (a second attach would confuse the resource tracker at exit).
+                    state["ring"] = state["client_ring"]
+                    state["read"] = 0
+                await ws.send_str("{}")
+            elif "shm_offset" in payload:
+                end = payload["shm_offset"]
+                samples = _to_float(state["ring"].read_views(state["read"], end))
+                state["read"] = end
+                await ws.send_str(json.dumps({"n": int(samples.shape[0])}))
+            else:
+                samples = _to_float([base64.b64decode(payload["pcm16_base64"])])
+                await ws.send_str(json.dumps({"n": int(samples.shape[0])}))
+        state["ring"] = None
+        return ws
+
+    app = web.Application()
+    app.add_routes([web.get("/stream", handle_stream)])
+    return app
+
+
+async def run_client(session, url, chunks, pcm, ring):
+    latencies = []
+    async with session.ws_connect(url) as ws:
+        start = {"type": "session.start", "session_id": "bench"}
+        if ring is not None:
+            start.update({"shm_name": ring.name, "shm_size": ring.size})
+        await ws.send_str(json.dumps(start))
+        await ws.receive()
+
+        for _ in range(chunks):
+            t0 = time.perf_counter()
+            if ring is not None:
+                msg = {"type": "audio.chunk", "session_id": "bench", "shm_offset": ring.write(pcm)}
+            else:
+                msg = {"type": "audio.chunk", "session_id": "bench", "pcm16_base64": base64.b64encode(pcm).decode("ascii")}
+            await ws.send_str(json.dumps(msg))
+            await ws.receive()
+            latencies.append((time.perf_counter() - t0) * 1e6)
+    return np.array(latencies)
+
+
+def report(label, lat_us, msg_bytes):
+    print(
+        f"{label:<22} p50={np.percentile(lat_us, 50):7.1f}us "
+        f"p95={np.percentile(lat_us, 95):7.1f}us mean={lat_us.mean():7.1f}us msg_bytes={msg_bytes}"
+    )
+
+
+async def main(args):
+    samples = int(args.sample_rate * args.chunk_ms / 1000)
+    pcm = (np.random.default_rng(0).standard_normal(samples) * 3000).astype(np.int16).tobytes()
+
+    state = {}
+    runner = web.AppRunner(build_app(state))
+    await runner.setup()
+    sock_path = os.path.join(tempfile.mkdtemp(), "puma-bench.sock")
+    await web.TCPSite(runner, "127.0.0.1", args.port).start()
+    await web.UnixSite(runner, sock_path).start()
+
+    try:
+        async with ClientSession() as tcp:
+            lat = await run_client(tcp, f"http://127.0.0.1:{args.port}/stream", args.chunks, pcm, None)
+        b64_len = len(json.dumps({"type": "audio.chunk", "session_id": "bench", "pcm16_base64": base64.b64encode(pcm).decode()}))
+        report("tcp + base64", lat, b64_len)
+
+        ring = SharedAudioRing.create(len(pcm) * 32)
+        state["client_ring"] = ring
+        try:
+            async with ClientSession(connector=UnixConnector(path=sock_path)) as uds:
+                lat = await run_client(uds, "http://localhost/stream", args.chunks, pcm, ring)
+        finally:
+            ring.close()
+        off_len = len(json.dumps({"type": "audio.chunk", "session_id": "bench", "shm_offset": 10 ** 9}))
+        report("unix + shm ring", lat, off_len)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--sample-rate", type=int, default=48000)
+    parser.add_argument("--port", type=int, default=8119)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Replays session captures (PUMA_CAPTURE_SESSIONS=1, see src/backend/session_capture.py) through a
+# local AudioService and compares partials, final text and finalize latency against the recording.
+# By default chunks are fed with their original arrival timing; --fast feeds them back to back
+# (partials are time-gated, so a fast replay mostly exercises the final decode).
+#
+# Usage: python3 scripts/replay_capture.py ~/.whisper_puma_captures/<file>.pumacap [...] [--fast] [--no-warmup]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "backend"))
+
+from audio_service import AudioService  # noqa: E402
+from logger_service import LoggerService  # noqa: E402
+from session_capture import CaptureRecording, load_capture  # noqa: E402
+
+
+def replay(audio_service: AudioService, recording: CaptureRecording, realtime: bool, session_id: str) -> dict:
+    start = recording.start
+    audio_service.create_stream_session(
+        session_id,
+        int(start.get("sample_rate", 16000)),
+        str(start.get("language", "en")),
+        str(start.get("model", "")),
+        str(start.get("partial_model_policy", "")),
+        capture=False,
+        decode_profile=str(start.get("decode_profile", "")),
+    )
+
+    partials = []
+    last_text = ""
+    origin = time.perf_counter()
+    for arrived_at, pcm16_bytes in recording.chunks:
+        if realtime:
+            delay = arrived_at - (time.perf_counter() - origin)
+            if delay > 0:
+                time.sleep(delay)
+        text = audio_service.append_chunk_and_maybe_decode(session_id, pcm16_bytes)
+        if text and text != last_text:
+            partials.append((time.perf_counter() - origin, text))
+            last_text = text
+
+    if realtime and recording.stop_at is not None:
+        delay = recording.stop_at - (time.perf_counter() - origin)
+        if delay > 0:
+            time.sleep(delay)
+    stop_at = time.perf_counter()
+    result = audio_service.finalize_stream_session(session_id)
+    return {
+        "partials": partials,
+        "final": result,
+        "finalize_ms": (time.perf_counter() - stop_at) * 1000.0,
+    }
+
+
+def report(recording: CaptureRecording, replayed: dict) -> None:
+    start = recording.start
+    sample_rate = int(start.get("sample_rate", 16000))
+    seconds = recording.audio_bytes / 2.0 / max(1, sample_rate)
+    original = recording.final or {}
+    original_finalize_ms = (
+        (recording.final_at - recording.stop_at) * 1000.0
+        if recording.final_at is not None and recording.stop_at is not None
+        else None
+    )
+
+    print(f"== {recording.path}")
+    print(
+        f"   session={start.get('session_id')} audio_s={seconds:.2f} chunks={len(recording.chunks)} "
+        f"model={start.get('model') or 'default'} policy={start.get('partial_model_policy') or 'default'} "
+        f"decode_profile={start.get('decode_profile') or 'default'}"
+        + (" (truncated capture)" if recording.truncated else "")
+    )
+    captured_updates = sum(
+        1 for i, (_, partial) in enumerate(recording.partials)
+        if i == 0 or partial.get("text") != recording.partials[i - 1][1].get("text")
+    )
+    print(f"   partial updates  captured={captured_updates} replayed={len(replayed['partials'])}")
+    if original_finalize_ms is not None:
+        print(f"   finalize         captured_ms={original_finalize_ms:.0f} replayed_ms={replayed['finalize_ms']:.0f}")
+    else:
+        print(f"   finalize         replayed_ms={replayed['finalize_ms']:.0f}")
+    captured_text = str(original.get("text", ""))
+    replayed_text = str(replayed["final"].get("text", ""))
+    print(f"   final text       {'identical' if captured_text == replayed_text else 'DIFFERS'}")
+    print(f"     captured: {captured_text}")
+    print(f"     replayed: {replayed_text}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("captures", nargs="+")
+    parser.add_argument("--fast", action="store_true", help="feed chunks as fast as possible instead of original timing")
+    parser.add_argument("--no-warmup", action="store_true", help="skip model warmup (first decode then includes load time)")
+    args = parser.parse_args()
+
+    logger = LoggerService()
+    audio_service = AudioService(logger)
+    if not args.no_warmup:
+        audio_service.preload_models()
+
+    for index, path in enumerate(args.captures):
+        recording = load_capture(path)
+        replayed = replay(audio_service, recording, not args.fast, f"replay-{index}-{recording.start.get('session_id', 'session')}")
+        report(recording, replayed)
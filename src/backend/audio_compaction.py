@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class CompactedAudio:
+    audio: np.ndarray
+    # Kept spans: compacted[comp_starts[i]:comp_starts[i]+lengths[i]] == original[orig_starts[i]:...]
+    orig_starts: np.ndarray
+    comp_starts: np.ndarray
+    lengths: np.ndarray
+    original_samples: int
+
+    @property
+    def removed_samples(self) -> int:
+        return self.original_samples - int(self.audio.shape[0])
+
+    def to_original(self, index: int) -> int:
+        if self.lengths.size == 0:
+            return int(index)
+        span = int(np.searchsorted(self.comp_starts, index, side="right")) - 1
+        span = min(max(span, 0), self.lengths.size - 1)
+        offset = min(max(0, int(index) - int(self.comp_starts[span])), int(self.lengths[span]))
+        return int(self.orig_starts[span]) + offset
+
+    def to_original_seconds(self, seconds: float, sample_rate: int) -> float:
+        return self.to_original(int(round(seconds * sample_rate))) / float(sample_rate)
+
+
+def uncompacted(audio: np.ndarray) -> CompactedAudio:
+    n = int(audio.shape[0])
+    spans = np.array([0], dtype=np.int64) if n else np.array([], dtype=np.int64)
+    return CompactedAudio(
+        audio=audio,
+        orig_starts=spans,
+        comp_starts=spans.copy(),
+        lengths=np.array([n], dtype=np.int64) if n else np.array([], dtype=np.int64),
+        original_samples=n,
+    )
+
+
+def compact_silence(
+    audio: np.ndarray,
+    sample_rate: int,
+    rms_threshold: float,
+    min_silence_ms: int = 600,
+    keep_gap_ms: int = 200,
+    frame_ms: int = 20,
+) -> CompactedAudio:
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = int(audio.shape[0]) // frame
+    if n_frames == 0:
+        return uncompacted(audio)
+
+    framed = audio[: n_frames * frame].reshape(n_frames, frame)
+    silent = np.sqrt(np.mean(np.square(framed), axis=1)) < rms_threshold
+    if silent.all() or not silent.any():
+        return uncompacted(audio)
+
+    # Silent runs as [start_frame, end_frame); a trailing partial frame follows the last frame.
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+
+    min_silence = int(sample_rate * min_silence_ms / 1000)
+    half_gap = int(sample_rate * keep_gap_ms / 2000)
+    total = int(audio.shape[0])
+
+    cuts = []
+    for start_f, end_f in zip(run_starts, run_ends):
+        start = int(start_f) * frame
+        end = total if end_f == n_frames else int(end_f) * frame
+        if end - start < min_silence:
+            continue
+        # Keep a short pad against speech on each side; leading/trailing dead air keeps only the inner pad.
+        cut_start = start if start == 0 else start + half_gap
+        cut_end = end if end == total else end - half_gap
+        if cut_end > cut_start:
+            cuts.append((cut_start, cut_end))
+
+    if not cuts:
+        return uncompacted(audio)
+
+    orig_starts, lengths = [], []
+    cursor = 0
+    for cut_start, cut_end in cuts:
+        if cut_start > cursor:
+            orig_starts.append(cursor)
+            lengths.append(cut_start - cursor)
+        cursor = cut_end
+    if cursor < total:
+        orig_starts.append(cursor)
+        lengths.append(total - cursor)
+
+    orig_starts = np.array(orig_starts, dtype=np.int64)
+    lengths = np.array(lengths, dtype=np.int64)
+    comp_starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    compacted = np.concatenate([audio[s:s + l] for s, l in zip(orig_starts, lengths)])
+    return CompactedAudio(
+        audio=compacted,
+        orig_starts=orig_starts,
+        comp_starts=comp_starts,
+        lengths=lengths,
+        original_samples=total,
+    )
@@ -1,15 +1,28 @@
 import base64
 import glob
+import math
 import os
+import re
 import threading
 import time
-from dataclasses import dataclass
-from typing import Dict
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Dict, Optional, Tuple, Union
 
 import numpy as np
 
 from logger_service import LoggerService
-from punctuation_service import PunctuationService
+from audio_compaction import compact_silence, uncompacted
+from decode_profiles import DecodeProfile, DecodeProfileRegistry
+from inference_worker import PRIORITY_FINAL, PRIORITY_PARTIAL, InferencePool, WorkerCrashed
+from log_mel import HOP_LENGTH, N_FRAMES, StreamingLogMel
+from punctuation_service import PunctuationService, PunctuationSettings
+from session_capture import CaptureStore, CaptureWriter
+from session_trace import NULL_TRACE, NullTrace, SessionTrace, prune_traces
+from shm_ring import SharedAudioRing
+
+PARTIAL_MODEL_POLICIES = ("cascade", "single")
 
 
 @dataclass
@@ -19,19 +32,36 @@ class StreamSession:
     language: str
     model_repo: str
     model_path: str
+    partial_policy: str
+    partial_model_path: str
     started_at: float
     audio: np.ndarray
     committed_text: str
     next_decode_start: int
     last_partial_decode_at: float
     last_decode_total_samples: int
+    partial_window_ms: int
+    partial_interval_s: float
+    partial_latency_ema_ms: float
+    partial_queue_depth_ema: float
+    partial_decode_count: int
+    decode_profile: DecodeProfile
+    partial_latency_sum_ms: float = 0.0
+    ring: Optional[SharedAudioRing] = None
+    ring_read_offset: int = 0
+    # Running log-mel buffers keyed by n_mels (partial and final models may differ, e.g. 80 vs 128).
+    features: Dict[int, StreamingLogMel] = field(default_factory=dict)
+    feature_ms: float = 0.0
+    trace: Union[SessionTrace, NullTrace] = NULL_TRACE
+    capture: Optional[CaptureWriter] = None
 
 
 class AudioService:
     def __init__(self, logger: LoggerService):
         self.logger = logger
         self.whisper_ready = False
-        self._mlock = threading.Lock()
+        self._decode_queue_depth = 0
+        self._decode_queue_lock = threading.Lock()
         self._sessions: Dict[str, StreamSession] = {}
         self._sessions_lock = threading.Lock()
 
@@ -43,17 +73,90 @@ class AudioService:
         self.default_model_path = self.primary_model_path
         self.model_sample_rate = 16000
 
-        # Rolling decode profile
-        self.window_ms = 800
-        self.overlap_ms = 120
-        self.vad_rms_threshold = 0.008
-        self.vad_rms_relaxed = 0.003
-        self.skip_tail_below_ms = 120
-        self.max_tail_decode_ms = 2200
-        self.full_finalize_max_seconds = 30.0
-        self.punctuation_service = PunctuationService(logger)
+        # Two-tier cascade: a fast resident model for live partials, the accuracy model for finals
+        self.partial_model_policy = self._normalize_partial_policy(os.getenv("PUMA_PARTIAL_MODEL_POLICY", "cascade"))
+        self.partial_repo_id = os.getenv("PUMA_PARTIAL_MODEL", self.turbo_repo_id)
+        self.partial_model_path = self._resolve_model_path(self.partial_repo_id, canonicalize=False)
+        self._policy_stats: Dict[str, Dict[str, float]] = {}
+
+        # Silence compaction before final decode
+        self.compact_silence_enabled = True
+        self.compact_min_silence_ms = 600
+        self.compact_keep_gap_ms = 200
+        self.compact_frame_ms = 20
+
+        # Incremental log-mel features (decodes slice these instead of re-running the STFT)
+        self.feature_decode_enabled = True
+        self._model_n_mels: Dict[str, int] = {}
+        self._feature_decode_unavailable = set()
+
+        # Per-session Chrome trace-event timelines (opt-in; disabled sessions use a no-op trace)
+        self.trace_sessions = os.getenv("PUMA_TRACE_SESSIONS", "0").lower() in {"1", "true", "yes", "on"}
+        self.trace_dir = os.path.expanduser(os.getenv("PUMA_TRACE_DIR", "~/.whisper_puma_traces"))
+        self.trace_max_files = max(1, int(os.getenv("PUMA_TRACE_MAX_FILES", "200")))
+        self.max_recent_traces = 20
+        self._recent_traces: "OrderedDict[str, SessionTrace]" = OrderedDict()
+
+        # Opt-in session capture for offline replay (PCM16 chunks, partials and final per session)
+        self.capture_sessions = os.getenv("PUMA_CAPTURE_SESSIONS", "0").lower() in {"1", "true", "yes", "on"}
+        self.capture_store = CaptureStore(
+            logger,
+            os.path.expanduser(os.getenv("PUMA_CAPTURE_DIR", "~/.whisper_puma_captures")),
+            max_bytes=int(max(1.0, float(os.getenv("PUMA_CAPTURE_MAX_MB", "512"))) * 1024 * 1024),
+            compress=os.getenv("PUMA_CAPTURE_COMPRESS", "1").lower() not in {"0", "false", "no", "off"},
+        )
+        if self.capture_sessions:
+            self.capture_store.enforce_quota()
+
+        # Adaptive partial cadence (per session, driven by measured decode latency)
+        self.partial_min_interval_s = 0.65
+        self.partial_max_interval_s = 2.5
+        self.partial_max_window_ms = 3000
+        self.partial_target_freshness_ms = 3000
+        self.partial_max_duty = 0.6
+        self.partial_latency_alpha = 0.3
+
+        # Models live in supervised worker processes; only session state and I/O stay here.
+        self.inference = InferencePool(
+            logger,
+            workers=max(1, int(os.getenv("PUMA_INFERENCE_WORKERS", "1"))),
+            job_timeout_s=max(5.0, float(os.getenv("PUMA_INFERENCE_JOB_TIMEOUT_SECONDS", "180"))),
+            warmup_timeout_s=max(60.0, float(os.getenv("PUMA_INFERENCE_WARMUP_TIMEOUT_SECONDS", "1800"))),
+        )
+        self.punctuation_service = PunctuationService(logger, inference=self.inference)
+
+        # Rolling decode profile ("default"); named alternatives load from PUMA_DECODE_PROFILES or POST /profiles
+        self.decode_profiles = DecodeProfileRegistry(
+            logger,
+            DecodeProfile(
+                name="default",
+                window_ms=800,
+                overlap_ms=120,
+                vad_rms_threshold=0.008,
+                vad_rms_relaxed=0.003,
+                skip_tail_below_ms=120,
+                max_tail_decode_ms=2200,
+                full_finalize_max_seconds=30.0,
+                punctuation=self.punctuation_service.default_settings(),
+            ),
+        )
+        self._profile_stats: Dict[str, Dict[str, float]] = {}
+        profiles_path = os.path.expanduser(os.getenv("PUMA_DECODE_PROFILES", ""))
+        if profiles_path:
+            try:
+                self.decode_profiles.load_file(profiles_path)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Could not load decode profiles from {profiles_path}: {e}")
         self._primary_decode_unavailable = False
 
+    def _normalize_partial_policy(self, policy: str) -> str:
+        normalized = (policy or "").strip().lower()
+        if normalized in PARTIAL_MODEL_POLICIES:
+            return normalized
+        if normalized:
+            self.logger.warning(f"Unknown partial model policy '{policy}'; using cascade.")
+        return "cascade"
+
     def _canonical_repo_id(self, repo_id: str) -> str:
         if not repo_id:
             return self.primary_repo_id
@@ -103,17 +206,9 @@ class AudioService:
     def preload_models(self) -> None:
         self.logger.info("Warming up MLX Whisper model in background...")
         try:
-            import mlx_whisper
-
-            dummy_audio = np.zeros(16000, dtype=np.float32)
-            with self._mlock:
-                mlx_whisper.transcribe(
-                    dummy_audio,
-                    path_or_hf_repo=self.primary_model_path,
-                    temperature=0.0,
-                    condition_on_previous_text=False,
-                    language="en",
-                )
+            result = self.inference.call("warmup_whisper", {"model_path": self.primary_model_path})
+            self._remember_n_mels(self.primary_model_path, result)
+            self.inference.add_warmup("warmup_whisper", {"model_path": self.primary_model_path})
             self.whisper_ready = True
             self.logger.info("MLX Whisper warmup complete.")
         except Exception as e:
@@ -125,17 +220,9 @@ class AudioService:
                     "Primary model warmup failed; switching process default to turbo."
                 )
                 try:
-                    import mlx_whisper
-
-                    dummy_audio = np.zeros(16000, dtype=np.float32)
-                    with self._mlock:
-                        mlx_whisper.transcribe(
-                            dummy_audio,
-                            path_or_hf_repo=self.turbo_model_path,
-                            temperature=0.0,
-                            condition_on_previous_text=False,
-                            language="en",
-                        )
+                    result = self.inference.call("warmup_whisper", {"model_path": self.turbo_model_path})
+                    self._remember_n_mels(self.turbo_model_path, result)
+                    self.inference.add_warmup("warmup_whisper", {"model_path": self.turbo_model_path})
                     self.whisper_ready = True
                     self.logger.info("Turbo warmup complete.")
                 except Exception as turbo_e:
@@ -143,8 +230,32 @@ class AudioService:
             else:
                 self.logger.error(f"Could not preload MLX Whisper: {e}")
 
+        final_model_path = self.turbo_model_path if self._primary_decode_unavailable else self.primary_model_path
+        if self.partial_model_policy == "cascade" and self.partial_model_path != final_model_path:
+            try:
+                result = self.inference.call("warmup_whisper", {"model_path": self.partial_model_path})
+                self._remember_n_mels(self.partial_model_path, result)
+                self.inference.add_warmup("warmup_whisper", {"model_path": self.partial_model_path})
+                self.logger.info(f"Partial model warmup complete ({self.partial_repo_id}).")
+            except Exception as e:
+                self.logger.error(f"Could not preload partial model {self.partial_repo_id}: {e}")
+
         self.punctuation_service.preload_model()
 
+    def _remember_n_mels(self, model_path: str, result: object) -> None:
+        # Workers report each model's mel bin count; features are only built for models we know.
+        if isinstance(result, dict) and result.get("n_mels"):
+            self._model_n_mels[model_path] = int(result["n_mels"])
+
+    def _feature_stream(self, session: StreamSession, model_path: str) -> Optional[StreamingLogMel]:
+        n_mels = self._model_n_mels.get(model_path)
+        if not self.feature_decode_enabled or not n_mels or model_path in self._feature_decode_unavailable:
+            return None
+        stream = session.features.get(n_mels)
+        if stream is None:
+            stream = session.features[n_mels] = StreamingLogMel(n_mels)
+        return stream
+
     def _has_speech(self, audio: np.ndarray, threshold: float) -> bool:
         if audio.size == 0:
             return False
@@ -182,7 +293,9 @@ class AudioService:
             t += "."
         return t
 
-    def _finalize_text(self, audio: np.ndarray, language: str, text: str) -> str:
+    def _finalize_text(
+        self, audio: np.ndarray, language: str, text: str, punctuation: Optional[PunctuationSettings] = None
+    ) -> str:
         normalized = " ".join((text or "").split()).strip()
         if not normalized:
             return ""
@@ -193,82 +306,130 @@ class AudioService:
                 audio=audio,
                 sampling_rate=self.model_sample_rate,
                 transcript=normalized,
+                settings=punctuation,
             )
             if restored:
                 return restored
 
         return self._fast_punctuate(normalized)
 
-    def _decode_np_audio(self, audio: np.ndarray, language: str, model_path: str) -> str:
-        import mlx_whisper
-
+    def _decode_np_audio(
+        self,
+        audio: np.ndarray,
+        language: str,
+        model_path: str,
+        features: Optional[np.ndarray] = None,
+        priority: int = PRIORITY_FINAL,
+        trace: Union[SessionTrace, NullTrace] = NULL_TRACE,
+    ) -> str:
         selected_model_path = model_path
         if selected_model_path == self.primary_model_path and self._primary_decode_unavailable:
             selected_model_path = self.turbo_model_path
 
-        with self._mlock:
+        with self._decode_queue_lock:
+            self._decode_queue_depth += 1
+        try:
+            result = None
+            if (
+                features is not None
+                and self.feature_decode_enabled
+                and selected_model_path not in self._feature_decode_unavailable
+                and features.shape[1] == self._model_n_mels.get(selected_model_path)
+            ):
+                try:
+                    result = self._transcribe_with_fallback(
+                        "transcribe_features", features, language, selected_model_path, priority, trace
+                    )
+                except WorkerCrashed:
+                    raise
+                except Exception as e:
+                    self._feature_decode_unavailable.add(selected_model_path)
+                    self.logger.warning(
+                        f"Feature decode path unavailable for {selected_model_path}; decoding raw audio for this model. Error: {e}"
+                    )
+            if result is None:
+                result = self._transcribe_with_fallback(
+                    "transcribe", audio, language, selected_model_path, priority, trace
+                )
+        finally:
+            with self._decode_queue_lock:
+                self._decode_queue_depth -= 1
+        return result.get("text", "").strip()
+
+    def _call_inference(
+        self,
+        kind: str,
+        data: np.ndarray,
+        language: str,
+        model_path: str,
+        priority: int,
+        trace: Union[SessionTrace, NullTrace],
+    ) -> dict:
+        timings: Optional[Dict[str, float]] = {} if trace.enabled else None
+        try:
+            result = self.inference.call(
+                kind,
+                {"model_path": model_path, "language": language or "en"},
+                data,
+                priority,
+                timings,
+            )
+            self._remember_n_mels(model_path, result)
+            return result
+        finally:
+            if timings:
+                trace.add("inference.queue_wait", timings["submitted_at"], timings["queue_s"], kind=kind)
+                trace.add("inference.run", timings["started_at"], timings["run_s"], kind=kind, model=model_path)
+
+    def _transcribe_with_fallback(
+        self,
+        kind: str,
+        data: np.ndarray,
+        language: str,
+        selected_model_path: str,
+        priority: int = PRIORITY_FINAL,
+        trace: Union[SessionTrace, NullTrace] = NULL_TRACE,
+    ) -> dict:
+        try:
+            return self._call_inference(kind, data, language, selected_model_path, priority, trace)
+        except Exception as e:
+            decode_error = str(e).lower()
+            is_primary_failure = selected_model_path == self.primary_model_path and (
+                "load_npz" in decode_error or "zip file" in decode_error
+            )
+            if not is_primary_failure:
+                raise
+
+            self._primary_decode_unavailable = True
+            self.logger.warning(
+                "Primary decode path unavailable; switching to turbo for this process."
+            )
+            return self._call_inference(kind, data, language, self.turbo_model_path, priority, trace)
+
+    def transcribe_audio(self, file_path: str) -> str:
+        try:
+            model_path = self.turbo_model_path if self._primary_decode_unavailable else self.primary_model_path
+            self.logger.info(f"Transcribing (legacy HTTP) with {'turbo' if self._primary_decode_unavailable else self.primary_repo_id}...")
             try:
-                result = mlx_whisper.transcribe(
-                    audio,
-                    path_or_hf_repo=selected_model_path,
-                    temperature=0.0,
-                    condition_on_previous_text=False,
-                    language=language or "en",
+                result = self.inference.call(
+                    "transcribe",
+                    {"model_path": model_path, "language": "en", "file_path": file_path},
                 )
             except Exception as e:
                 decode_error = str(e).lower()
-                is_primary_failure = selected_model_path == self.primary_model_path and (
-                    "load_npz" in decode_error or "zip file" in decode_error
+                is_primary_failure = (
+                    model_path == self.primary_model_path
+                    and ("load_npz" in decode_error or "zip file" in decode_error)
                 )
                 if not is_primary_failure:
                     raise
 
                 self._primary_decode_unavailable = True
-                self.logger.warning(
-                    "Primary decode path unavailable; switching to turbo for this process."
-                )
-                result = mlx_whisper.transcribe(
-                    audio,
-                    path_or_hf_repo=self.turbo_model_path,
-                    temperature=0.0,
-                    condition_on_previous_text=False,
-                    language=language or "en",
+                self.logger.warning("Primary legacy decode unavailable; retrying on turbo.")
+                result = self.inference.call(
+                    "transcribe",
+                    {"model_path": self.turbo_model_path, "language": "en", "file_path": file_path},
                 )
-        return result.get("text", "").strip()
-
-    def transcribe_audio(self, file_path: str) -> str:
-        try:
-            import mlx_whisper
-
-            model_path = self.turbo_model_path if self._primary_decode_unavailable else self.primary_model_path
-            self.logger.info(f"Transcribing (legacy HTTP) with {'turbo' if self._primary_decode_unavailable else self.primary_repo_id}...")
-            with self._mlock:
-                try:
-                    result = mlx_whisper.transcribe(
-                        file_path,
-                        path_or_hf_repo=model_path,
-                        temperature=0.0,
-                        condition_on_previous_text=False,
-                        language="en",
-                    )
-                except Exception as e:
-                    decode_error = str(e).lower()
-                    is_primary_failure = (
-                        model_path == self.primary_model_path
-                        and ("load_npz" in decode_error or "zip file" in decode_error)
-                    )
-                    if not is_primary_failure:
-                        raise
-
-                    self._primary_decode_unavailable = True
-                    self.logger.warning("Primary legacy decode unavailable; retrying on turbo.")
-                    result = mlx_whisper.transcribe(
-                        file_path,
-                        path_or_hf_repo=self.turbo_model_path,
-                        temperature=0.0,
-                        condition_on_previous_text=False,
-                        language="en",
-                    )
 
             text = result["text"].strip()
             if not text:
@@ -295,28 +456,110 @@ class AudioService:
             self.logger.error(f"mlx_whisper failed: {e}")
             return ""
 
-    def create_stream_session(self, session_id: str, sample_rate: int, language: str = "en", model_repo: str = "") -> None:
+    def create_stream_session(
+        self,
+        session_id: str,
+        sample_rate: int,
+        language: str = "en",
+        model_repo: str = "",
+        partial_policy: str = "",
+        trace: Optional[bool] = None,
+        capture: Optional[bool] = None,
+        decode_profile: str = "",
+    ) -> str:
         input_sr = max(1, int(sample_rate))
         using_turbo_default = self._primary_decode_unavailable
         repo = self.turbo_repo_id if using_turbo_default else self._canonical_repo_id(model_repo or self.default_repo_id)
         model_path = self.turbo_model_path if using_turbo_default else self._resolve_model_path(repo)
+        policy = self._normalize_partial_policy(partial_policy) if partial_policy else self.partial_model_policy
+        partial_model_path = self.partial_model_path if policy == "cascade" else model_path
+        trace_enabled = self.trace_sessions if trace is None else bool(trace)
+        profile = self.decode_profiles.assign(decode_profile)
+        capture_writer = None
+        if self.capture_sessions if capture is None else capture:
+            capture_writer = self.capture_store.open(
+                session_id,
+                {
+                    "session_id": session_id,
+                    "sample_rate": input_sr,
+                    "language": language or "en",
+                    "model": model_repo,
+                    "partial_model_policy": partial_policy,
+                    "decode_profile": profile.name,
+                    "started_at": time.time(),
+                },
+            )
         self.logger.info(
-            f"Stream session started ({session_id}) input_sr={input_sr} model_sr={self.model_sample_rate} repo={repo}"
+            f"Stream session started ({session_id}) input_sr={input_sr} model_sr={self.model_sample_rate} repo={repo} "
+            f"partial_policy={policy} decode_profile={profile.name}"
         )
         with self._sessions_lock:
+            replaced = self._sessions.get(session_id)
             self._sessions[session_id] = StreamSession(
                 session_id=session_id,
                 sample_rate=input_sr,
                 language=language or "en",
                 model_repo=repo,
                 model_path=model_path,
+                partial_policy=policy,
+                partial_model_path=partial_model_path,
                 started_at=time.time(),
                 audio=np.array([], dtype=np.float32),
                 committed_text="",
                 next_decode_start=0,
                 last_partial_decode_at=0.0,
                 last_decode_total_samples=0,
+                partial_window_ms=profile.window_ms,
+                partial_interval_s=self.partial_min_interval_s,
+                partial_latency_ema_ms=0.0,
+                partial_queue_depth_ema=0.0,
+                partial_decode_count=0,
+                decode_profile=profile,
+                trace=SessionTrace(session_id) if trace_enabled else NULL_TRACE,
+                capture=capture_writer,
             )
+        if replaced is not None:
+            self.logger.warning(f"Stream session restarted before stop ({session_id}); discarding previous audio.")
+            self._release_session(session_id, replaced)
+        return profile.name
+
+    def _next_partial_cadence(
+        self, latency_ema_ms: float, queue_depth: float, profile: DecodeProfile
+    ) -> Tuple[int, float]:
+        # Decode at the fastest cadence unless partials (including queued decodes from other sessions)
+        # would push the model past its duty budget; the duty interval is a floor nothing undercuts.
+        load_ms = latency_ema_ms * (1 + max(0, queue_depth))
+        interval_ms = max(self.partial_min_interval_s * 1000.0, load_ms / self.partial_max_duty)
+        # Once decode time alone blows the freshness target (wait plus decode), partials cannot be fresh
+        # anyway, so back off to the slowest cadence instead of saturating the model.
+        if latency_ema_ms + self.partial_min_interval_s * 1000.0 >= self.partial_target_freshness_ms:
+            interval_ms = self.partial_max_interval_s * 1000.0
+        interval_s = min(self.partial_max_interval_s, max(self.partial_min_interval_s, interval_ms / 1000.0))
+
+        # Window must cover the audio that arrived since the last decode, plus overlap.
+        window_ms = int(interval_s * 1000.0) + profile.overlap_ms
+        window_ms = min(max(self.partial_max_window_ms, profile.window_ms), max(profile.window_ms, window_ms))
+        return window_ms, interval_s
+
+    def attach_audio_ring(self, session_id: str, shm_name: str, shm_size: int) -> bool:
+        try:
+            ring = SharedAudioRing.attach(shm_name, shm_size)
+        except Exception as e:
+            self.logger.error(f"Could not attach shared audio ring ({session_id}) name={shm_name}: {e}")
+            return False
+
+        with self._sessions_lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                ring.close()
+                return False
+            if session.ring is not None:
+                session.ring.close()
+            session.ring = ring
+            session.ring_read_offset = 0
+
+        self.logger.info(f"Shared audio ring attached ({session_id}) name={shm_name} size={ring.size}")
+        return True
 
     def append_chunk_and_maybe_decode(self, session_id: str, pcm16_bytes: bytes) -> str:
         with self._sessions_lock:
@@ -330,25 +573,80 @@ class AudioService:
         audio_i16 = np.frombuffer(pcm16_bytes, dtype=np.int16)
         if audio_i16.size == 0:
             return session.committed_text
+        if session.capture is not None:
+            session.capture.write_chunk(pcm16_bytes[: audio_i16.size * 2])
 
-        chunk = (audio_i16.astype(np.float32) / 32768.0).clip(-1.0, 1.0)
+        with session.trace.span("chunk.convert", samples=int(audio_i16.size)):
+            chunk = (audio_i16.astype(np.float32) / 32768.0).clip(-1.0, 1.0)
+        return self._append_float_chunk_and_maybe_decode(session_id, session, chunk)
 
+    def append_ring_chunk_and_maybe_decode(self, session_id: str, write_offset: int) -> str:
+        with self._sessions_lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return ""
+            ring = session.ring
+            read_offset = session.ring_read_offset
+
+        if ring is None:
+            self.logger.warning(f"stream ring chunk without registered ring ({session_id})")
+            return session.committed_text
+
+        write_offset = int(write_offset) & ~1
+        if write_offset <= read_offset:
+            return session.committed_text
+
+        if write_offset - read_offset > ring.size:
+            dropped = write_offset - read_offset - ring.size
+            self.logger.warning(f"stream ring overrun ({session_id}) dropped_bytes={dropped}")
+            read_offset = write_offset - ring.size
+
+        # int16 views straight onto the shared segment; the only copy is the float conversion.
+        with session.trace.span("chunk.ring_read", bytes=write_offset - read_offset):
+            views = ring.read_views(read_offset, write_offset)
+            if session.capture is not None:
+                session.capture.write_chunk(b"".join(views))
+            parts = [(np.frombuffer(view, dtype=np.int16).astype(np.float32) / 32768.0) for view in views]
+            del views
+            chunk = (parts[0] if len(parts) == 1 else np.concatenate(parts)).clip(-1.0, 1.0)
+            del parts
+
+        with self._sessions_lock:
+            session.ring_read_offset = write_offset
+
+        return self._append_float_chunk_and_maybe_decode(session_id, session, chunk)
+
+    def _append_float_chunk_and_maybe_decode(self, session_id: str, session: StreamSession, chunk: np.ndarray) -> str:
         with self._sessions_lock:
             input_sr = session.sample_rate
             language = session.language
-            model_path = session.model_path
+            model_path = session.partial_model_path
             last_partial_decode_at = session.last_partial_decode_at
-            last_decode_total_samples = session.last_decode_total_samples
+            partial_window_ms = session.partial_window_ms
+            partial_interval_s = session.partial_interval_s
+            profile = session.decode_profile
+            trace = session.trace
 
         if input_sr != self.model_sample_rate:
-            chunk = self._resample_audio(chunk, input_sr, self.model_sample_rate)
+            with trace.span("chunk.resample", from_rate=input_sr, samples=int(chunk.shape[0])):
+                chunk = self._resample_audio(chunk, input_sr, self.model_sample_rate)
 
         with self._sessions_lock:
             session.audio = np.concatenate([session.audio, chunk])
-            window_samples = int(self.model_sample_rate * (self.window_ms / 1000.0))
-            step_samples = int(self.model_sample_rate * ((self.window_ms - self.overlap_ms) / 1000.0))
+            window_samples = int(self.model_sample_rate * (partial_window_ms / 1000.0))
+            step_samples = int(self.model_sample_rate * ((partial_window_ms - profile.overlap_ms) / 1000.0))
             start = session.next_decode_start
             total = session.audio.shape[0]
+            features = self._feature_stream(session, model_path)
+            self._feature_stream(session, session.model_path)
+            streams = list(session.features.values())
+
+        if streams:
+            t0 = time.time()
+            with trace.span("features.update"):
+                for stream in streams:
+                    stream.update(session.audio)
+            session.feature_ms += (time.time() - t0) * 1000.0
 
         if step_samples <= 0 or window_samples <= 0:
             return session.committed_text
@@ -356,20 +654,29 @@ class AudioService:
         updated_text = None
 
         # Decode at most one partial window per call to avoid backlog/catch-up latency.
-        if (total - start >= window_samples) and ((time.time() - last_partial_decode_at) >= 0.65):
+        if (total - start >= window_samples) and ((time.time() - last_partial_decode_at) >= partial_interval_s):
             # Always decode the newest window so the model stays near-real-time.
             decode_start = max(start, total - window_samples)
             segment = session.audio[decode_start:decode_start + window_samples]
-            if self._has_speech(segment, self.vad_rms_threshold):
-                try:
+            if self._has_speech(segment, profile.vad_rms_threshold):
+                segment_features = None
+                if features is not None:
                     t0 = time.time()
-                    decoded = self._decode_np_audio(segment, language, model_path)
-                    self.logger.info(
-                        f"stream partial decoded ({session_id}) len={segment.shape[0]} took_ms={int((time.time()-t0)*1000)}"
-                    )
+                    with trace.span("features.slice"):
+                        segment_features = features.features_for_spans(session.audio, [(decode_start, segment.shape[0])])
+                    session.feature_ms += (time.time() - t0) * 1000.0
+
+                queue_depth = self._decode_queue_depth
+                t0 = time.time()
+                try:
+                    with trace.span("decode.partial", samples=int(segment.shape[0])):
+                        decoded = self._decode_np_audio(
+                            segment, language, model_path, segment_features, priority=PRIORITY_PARTIAL, trace=trace
+                        )
                 except Exception as e:
                     self.logger.error(f"stream partial decode failed ({session_id}): {e}")
                     decoded = ""
+                took_ms = (time.time() - t0) * 1000.0
 
                 with self._sessions_lock:
                     live = self._sessions.get(session_id)
@@ -381,8 +688,32 @@ class AudioService:
                     live.last_decode_total_samples = total
                     updated_text = live.committed_text
 
+                    if live.partial_decode_count == 0:
+                        live.partial_latency_ema_ms = took_ms
+                        live.partial_queue_depth_ema = float(queue_depth)
+                    else:
+                        alpha = self.partial_latency_alpha
+                        live.partial_latency_ema_ms = alpha * took_ms + (1.0 - alpha) * live.partial_latency_ema_ms
+                        live.partial_queue_depth_ema = alpha * queue_depth + (1.0 - alpha) * live.partial_queue_depth_ema
+                    live.partial_decode_count += 1
+                    live.partial_latency_sum_ms += took_ms
+                    live.partial_window_ms, live.partial_interval_s = self._next_partial_cadence(
+                        live.partial_latency_ema_ms, live.partial_queue_depth_ema, profile
+                    )
+                    latency_ema_ms = live.partial_latency_ema_ms
+                    next_window_ms = live.partial_window_ms
+                    next_interval_s = live.partial_interval_s
+
+                if session.capture is not None:
+                    session.capture.write_partial(updated_text, took_ms)
+                self.logger.info(
+                    f"stream partial decoded ({session_id}) len={segment.shape[0]} took_ms={int(took_ms)} "
+                    f"ema_ms={int(latency_ema_ms)} queue={queue_depth} "
+                    f"next_window_ms={next_window_ms} next_interval_ms={int(next_interval_s * 1000)}"
+                )
+
             # Keep only a short overlap as undecoded tail.
-            overlap_tail = int(self.model_sample_rate * (self.overlap_ms / 1000.0))
+            overlap_tail = int(self.model_sample_rate * (profile.overlap_ms / 1000.0))
             start = max(0, total - overlap_tail)
 
         with self._sessions_lock:
@@ -393,6 +724,7 @@ class AudioService:
             return updated_text if updated_text is not None else live.committed_text
 
     def finalize_stream_session(self, session_id: str) -> Dict[str, object]:
+        finalize_started = time.time()
         with self._sessions_lock:
             session = self._sessions.get(session_id)
             if session is None:
@@ -402,32 +734,83 @@ class AudioService:
             language = session.language
             model_repo = session.model_repo
             model_path = session.model_path
+            partial_model_path = session.partial_model_path
             committed = session.committed_text
             tail_start = session.next_decode_start
             started_at = session.started_at
             last_decode_total_samples = session.last_decode_total_samples
+            features = self._feature_stream(session, model_path)
+            feature_frames = max((stream.committed_frames for stream in session.features.values()), default=0)
+            feature_ms = session.feature_ms
+            trace = session.trace
+            capture = session.capture
+            profile = session.decode_profile
+            metrics = self._session_metrics(session)
+
+        if capture is not None:
+            capture.write_stop()
 
-        duration_seconds = (audio.shape[0] / float(self.model_sample_rate)) if audio.size > 0 else 0.0
         tail = audio[tail_start:]
         final_text = committed
+        final_source = "partials"
+
+        # Shorten long pauses and dead air so full decodes (and punctuation) only pay for speech.
+        t0 = time.time()
+        with trace.span("finalize.compaction", samples=int(audio.shape[0])):
+            if self.compact_silence_enabled and audio.size > 0:
+                compacted = compact_silence(
+                    audio,
+                    self.model_sample_rate,
+                    profile.vad_rms_relaxed,
+                    min_silence_ms=self.compact_min_silence_ms,
+                    keep_gap_ms=self.compact_keep_gap_ms,
+                    frame_ms=self.compact_frame_ms,
+                )
+            else:
+                compacted = uncompacted(audio)
+        final_audio = compacted.audio
+        removed_seconds = compacted.removed_samples / float(self.model_sample_rate)
+        compact_ms = (time.time() - t0) * 1000.0
+        full_decode_ms = 0.0
+
+        duration_seconds = (final_audio.shape[0] / float(self.model_sample_rate)) if final_audio.size > 0 else 0.0
+
+        # Final features are the kept spans of the running log-mel buffer; None past the 30 s context.
+        final_features = None
+        if features is not None and final_audio.size > 0:
+            t0 = time.time()
+            with trace.span("features.final_slice"):
+                final_features = features.features_for_spans(
+                    audio, zip(compacted.orig_starts.tolist(), compacted.lengths.tolist())
+                )
+            final_feature_ms = (time.time() - t0) * 1000.0
+            feature_ms += final_feature_ms
+        else:
+            final_feature_ms = 0.0
 
         # Accuracy-first finalization for normal utterances:
         # use one full-audio decode to avoid dropped middle words from window merges.
-        if audio.size > 0 and duration_seconds <= self.full_finalize_max_seconds:
+        # Cascade partials come from the fast model, so long cascade sessions also get a primary-model
+        # decode (features stop at 30 s; raw transcribe windows the longer audio itself).
+        cascade_partials = partial_model_path != model_path
+        if final_audio.size > 0 and (duration_seconds <= profile.full_finalize_max_seconds or cascade_partials):
             try:
                 t0 = time.time()
-                full_text = self._decode_np_audio(audio, language, model_path)
+                with trace.span("decode.full_final", samples=int(final_audio.shape[0])):
+                    full_text = self._decode_np_audio(final_audio, language, model_path, final_features, trace=trace)
+                full_decode_ms += (time.time() - t0) * 1000.0
                 self.logger.info(
-                    f"stream full-final decoded ({session_id}) len={audio.shape[0]} dur_s={duration_seconds:.2f} took_ms={int((time.time()-t0)*1000)}"
+                    f"stream full-final decoded ({session_id}) len={final_audio.shape[0]} dur_s={duration_seconds:.2f} took_ms={int((time.time()-t0)*1000)}"
                 )
                 final_text = full_text.strip()
+                final_source = "full_final"
             except Exception as e:
                 self.logger.error(f"stream full-final decode failed ({session_id}): {e}")
 
         # For long utterances, keep the low-latency reconcile strategy.
         if not final_text.strip():
             new_since_last_decode = max(0, audio.size - last_decode_total_samples)
-            tiny_tail_samples = int(self.model_sample_rate * (self.skip_tail_below_ms / 1000.0))
+            tiny_tail_samples = int(self.model_sample_rate * (profile.skip_tail_below_ms / 1000.0))
             should_decode_tail = (
                 audio.size > 0
                 and (new_since_last_decode >= tiny_tail_samples or not final_text.strip())
@@ -435,18 +818,20 @@ class AudioService:
 
             if should_decode_tail:
                 try:
-                    max_tail_samples = int(self.model_sample_rate * (self.max_tail_decode_ms / 1000.0))
+                    max_tail_samples = int(self.model_sample_rate * (profile.max_tail_decode_ms / 1000.0))
                     recent = audio[-max_tail_samples:] if audio.size > max_tail_samples else audio
-                    if tail.size > 0 and self._has_speech(tail, self.vad_rms_relaxed):
+                    if tail.size > 0 and self._has_speech(tail, profile.vad_rms_relaxed):
                         segment = recent
                     else:
                         segment = recent
                     t0 = time.time()
-                    tail_text = self._decode_np_audio(segment, language, model_path)
+                    with trace.span("decode.reconcile", samples=int(segment.shape[0])):
+                        tail_text = self._decode_np_audio(segment, language, model_path, trace=trace)
                     self.logger.info(
                         f"stream reconcile decoded ({session_id}) len={segment.shape[0]} took_ms={int((time.time()-t0)*1000)}"
                     )
                     final_text = self._merge_text(final_text, tail_text)
+                    final_source = "reconcile"
                 except Exception as e:
                     self.logger.error(f"stream reconcile decode failed ({session_id}): {e}")
             else:
@@ -455,34 +840,254 @@ class AudioService:
                 )
 
         # Safety fallback for very short or very quiet clips.
-        if not final_text.strip() and audio.size > 0:
+        if not final_text.strip() and final_audio.size > 0:
             try:
                 t0 = time.time()
-                retry_text = self._decode_np_audio(audio, language, model_path)
+                with trace.span("decode.fallback", samples=int(final_audio.shape[0])):
+                    retry_text = self._decode_np_audio(final_audio, language, model_path, final_features, trace=trace)
+                full_decode_ms += (time.time() - t0) * 1000.0
                 self.logger.info(
-                    f"stream full fallback decoded ({session_id}) len={audio.shape[0]} took_ms={int((time.time()-t0)*1000)}"
+                    f"stream full fallback decoded ({session_id}) len={final_audio.shape[0]} took_ms={int((time.time()-t0)*1000)}"
                 )
                 final_text = retry_text.strip()
+                final_source = "fallback"
             except Exception as e:
                 self.logger.error(f"stream fallback decode failed ({session_id}): {e}")
 
         # Hidden reliability rescue: if primary returns empty, retry once on turbo.
-        if not final_text.strip() and audio.size > 0 and model_repo != self.turbo_repo_id:
+        if not final_text.strip() and final_audio.size > 0 and model_repo != self.turbo_repo_id:
             try:
                 t0 = time.time()
-                turbo_text = self._decode_np_audio(audio, language, self.turbo_model_path)
+                with trace.span("decode.turbo_rescue", samples=int(final_audio.shape[0])):
+                    turbo_text = self._decode_np_audio(
+                        final_audio, language, self.turbo_model_path, final_features, trace=trace
+                    )
+                full_decode_ms += (time.time() - t0) * 1000.0
                 self.logger.info(
-                    f"stream turbo-rescue decoded ({session_id}) len={audio.shape[0]} took_ms={int((time.time()-t0)*1000)}"
+                    f"stream turbo-rescue decoded ({session_id}) len={final_audio.shape[0]} took_ms={int((time.time()-t0)*1000)}"
                 )
                 final_text = turbo_text.strip()
+                final_source = "turbo_rescue"
             except Exception as e:
                 self.logger.error(f"stream turbo-rescue decode failed ({session_id}): {e}")
 
         with self._sessions_lock:
-            self._sessions.pop(session_id, None)
+            finished = self._sessions.pop(session_id, None)
+        if finished is not None:
+            # The capture stays open for the final frame and is closed below.
+            finished.capture = None
+            self._release_session(session_id, finished)
+
+        # Rough estimate: Whisper pads every clip to 30 s windows, so encoder cost scales with the window
+        # count, not seconds; removing silence only saves time when it drops whole windows.
+        window_samples = N_FRAMES * HOP_LENGTH
+        kept_windows = math.ceil(final_audio.shape[0] / window_samples)
+        original_windows = math.ceil((final_audio.shape[0] + compacted.removed_samples) / window_samples)
+        saved_ms = full_decode_ms * (original_windows - kept_windows) / kept_windows if kept_windows else 0.0
+        # "partials" means the final is the live hypothesis (divergence is 0 by construction).
+        metrics["final_source"] = final_source
+        metrics["compaction_removed_s"] = round(removed_seconds, 2)
+        metrics["compaction_est_decode_saved_ms"] = int(saved_ms)
+        metrics["compaction_ms"] = round(compact_ms, 2)
+        metrics["feature_ms"] = round(feature_ms, 2)
+        metrics["final_feature_ms"] = round(final_feature_ms, 2)
+
+        # How far the live partial hypothesis drifted from the final (0 = identical words).
+        divergence = self._text_divergence(committed, final_text)
+        metrics["final_partial_divergence"] = round(divergence, 3)
+        self._record_policy_stats(metrics["partial_policy"], metrics, divergence)
 
         latency_ms = int((time.time() - started_at) * 1000.0)
-        return {"text": self._finalize_text(audio, language, final_text.strip()), "latency_ms": latency_ms}
+        self.logger.info(
+            f"stream partial cadence ({session_id}) decodes={metrics['partial_decodes']} "
+            f"ema_ms={metrics['partial_latency_ema_ms']} window_ms={metrics['partial_window_ms']} "
+            f"interval_ms={metrics['partial_interval_ms']}"
+        )
+        self.logger.info(
+            f"stream silence compaction ({session_id}) removed_s={removed_seconds:.2f} "
+            f"kept_s={duration_seconds:.2f} est_decode_saved_ms={int(saved_ms)} took_ms={compact_ms:.1f}"
+        )
+        self.logger.info(
+            f"stream partial policy ({session_id}) policy={metrics['partial_policy']} "
+            f"avg_partial_ms={metrics['partial_latency_avg_ms']} divergence={divergence:.3f}"
+        )
+        self.logger.info(
+            f"stream features ({session_id}) frames={feature_frames} "
+            f"total_ms={feature_ms:.1f} final_slice_ms={final_feature_ms:.1f}"
+        )
+        with trace.span("punctuation.restore", words=len(final_text.split())):
+            text = self._finalize_text(final_audio, language, final_text.strip(), profile.punctuation)
+
+        metrics["finalize_ms"] = int((time.time() - finalize_started) * 1000.0)
+        self._record_profile_stats(profile.name, metrics, latency_ms, divergence, text)
+
+        if trace.enabled:
+            with self._sessions_lock:
+                self._recent_traces[session_id] = trace
+                while len(self._recent_traces) > self.max_recent_traces:
+                    self._recent_traces.popitem(last=False)
+
+        result = {
+            "text": text,
+            "latency_ms": latency_ms,
+            "metrics": metrics,
+        }
+        if capture is not None:
+            capture.write_final(result)
+            self.capture_store.close(session_id, capture)
+        return result
+
+    def _release_session(self, session_id: str, session: StreamSession) -> None:
+        if session.ring is not None:
+            session.ring.close()
+            session.ring = None
+        # Abandoned or replaced sessions still close their capture, which then replays as truncated (no stop/final).
+        if session.capture is not None:
+            self.capture_store.close(session_id, session.capture)
+            session.capture = None
+
+    def discard_stream_session(self, session_id: str) -> bool:
+        # Drops a session that will never be finalized (client disconnected or cancelled mid-dictation).
+        with self._sessions_lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._release_session(session_id, session)
+        self.logger.info(
+            f"Stream session discarded ({session_id}) audio_s={session.audio.shape[0] / float(self.model_sample_rate):.2f}"
+        )
+        return True
+
+    def trace_for(self, session_id: str) -> Union[SessionTrace, NullTrace]:
+        with self._sessions_lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                return session.trace
+            return self._recent_traces.get(session_id, NULL_TRACE)
+
+    def get_trace(self, session_id: str) -> Optional[Dict[str, object]]:
+        trace = self.trace_for(session_id)
+        if not trace.enabled:
+            return None
+        return trace.to_chrome_trace()
+
+    def write_trace(self, session_id: str) -> Optional[str]:
+        trace = self.trace_for(session_id)
+        if not trace.enabled:
+            return None
+        try:
+            path = trace.write(self.trace_dir)
+        except OSError as e:
+            self.logger.error(f"Could not write session trace ({session_id}): {e}")
+            return None
+        evicted = prune_traces(self.trace_dir, self.trace_max_files)
+        self.logger.info(f"Session trace written ({session_id}) path={path} evicted={evicted}")
+        return path
+
+    def _text_divergence(self, partial: str, final: str) -> float:
+        partial_words = re.sub(r"[^a-z0-9']+", " ", (partial or "").lower()).split()
+        final_words = re.sub(r"[^a-z0-9']+", " ", (final or "").lower()).split()
+        if not partial_words and not final_words:
+            return 0.0
+        return 1.0 - SequenceMatcher(None, partial_words, final_words).ratio()
+
+    def _record_policy_stats(self, policy: str, metrics: Dict[str, object], divergence: float) -> None:
+        with self._sessions_lock:
+            stats = self._policy_stats.setdefault(
+                policy, {"sessions": 0, "partial_decodes": 0, "partial_latency_sum_ms": 0.0, "divergence_sum": 0.0}
+            )
+            stats["sessions"] += 1
+            stats["partial_decodes"] += metrics["partial_decodes"]
+            stats["partial_latency_sum_ms"] += metrics["partial_latency_avg_ms"] * metrics["partial_decodes"]
+            stats["divergence_sum"] += divergence
+
+    def _record_profile_stats(
+        self, profile_name: str, metrics: Dict[str, object], latency_ms: int, divergence: float, text: str
+    ) -> None:
+        with self._sessions_lock:
+            stats = self._profile_stats.setdefault(
+                profile_name,
+                {
+                    "sessions": 0,
+                    "empty_finals": 0,
+                    "words": 0,
+                    "latency_sum_ms": 0.0,
+                    "finalize_sum_ms": 0.0,
+                    "partial_decodes": 0,
+                    "partial_latency_sum_ms": 0.0,
+                    "divergence_sum": 0.0,
+                },
+            )
+            stats["sessions"] += 1
+            stats["empty_finals"] += 0 if text else 1
+            stats["words"] += len(text.split())
+            stats["latency_sum_ms"] += latency_ms
+            stats["finalize_sum_ms"] += metrics["finalize_ms"]
+            stats["partial_decodes"] += metrics["partial_decodes"]
+            stats["partial_latency_sum_ms"] += metrics["partial_latency_avg_ms"] * metrics["partial_decodes"]
+            stats["divergence_sum"] += divergence
+
+    def _profile_metrics(self) -> Dict[str, object]:
+        with self._sessions_lock:
+            return {
+                name: {
+                    "sessions": int(stats["sessions"]),
+                    "empty_finals": int(stats["empty_finals"]),
+                    "avg_words": round(stats["words"] / max(1, stats["sessions"]), 1),
+                    "avg_latency_ms": int(stats["latency_sum_ms"] / max(1, stats["sessions"])),
+                    "avg_finalize_ms": int(stats["finalize_sum_ms"] / max(1, stats["sessions"])),
+                    "partial_decodes": int(stats["partial_decodes"]),
+                    "avg_partial_latency_ms": int(stats["partial_latency_sum_ms"] / max(1, stats["partial_decodes"])),
+                    "avg_final_partial_divergence": round(stats["divergence_sum"] / max(1, stats["sessions"]), 3),
+                }
+                for name, stats in self._profile_stats.items()
+            }
+
+    def get_decode_profiles(self) -> Dict[str, object]:
+        described = self.decode_profiles.describe()
+        described["stats"] = self._profile_metrics()
+        return described
+
+    def update_decode_profiles(self, data: Dict[str, object]) -> Dict[str, object]:
+        self.decode_profiles.apply(data)
+        return self.get_decode_profiles()
+
+    def load_decode_profiles(self, path: str) -> Dict[str, object]:
+        self.decode_profiles.load_file(path)
+        return self.get_decode_profiles()
+
+    def _session_metrics(self, session: StreamSession) -> Dict[str, object]:
+        return {
+            "decode_profile": session.decode_profile.name,
+            "partial_policy": session.partial_policy,
+            "partial_decodes": session.partial_decode_count,
+            "partial_latency_avg_ms": int(session.partial_latency_sum_ms / max(1, session.partial_decode_count)),
+            "partial_latency_ema_ms": int(session.partial_latency_ema_ms),
+            "partial_queue_depth_ema": round(session.partial_queue_depth_ema, 2),
+            "partial_window_ms": session.partial_window_ms,
+            "partial_interval_ms": int(session.partial_interval_s * 1000),
+        }
+
+    def get_metrics(self) -> Dict[str, object]:
+        with self._sessions_lock:
+            sessions = {sid: self._session_metrics(s) for sid, s in self._sessions.items()}
+            policies = {
+                policy: {
+                    "sessions": int(stats["sessions"]),
+                    "partial_decodes": int(stats["partial_decodes"]),
+                    "avg_partial_latency_ms": int(stats["partial_latency_sum_ms"] / max(1, stats["partial_decodes"])),
+                    "avg_final_partial_divergence": round(stats["divergence_sum"] / max(1, stats["sessions"]), 3),
+                }
+                for policy, stats in self._policy_stats.items()
+            }
+        return {
+            "decode_queue_depth": self._decode_queue_depth,
+            "inference": self.inference.stats(),
+            "partial_policies": policies,
+            "decode_profiles": self._profile_metrics(),
+            "captures": self.capture_store.stats(),
+            "sessions": sessions,
+        }
 
     def decode_base64_chunk(self, b64_payload: str) -> bytes:
         if not b64_payload:
@@ -0,0 +1,205 @@
+import dataclasses
+import json
+import math
+import random
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from logger_service import LoggerService
+from punctuation_service import PunctuationSettings
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+# One named set of stream decode parameters. Sessions keep the profile they started with,
+# so loading or switching profiles never changes a dictation that is already running.
+@dataclass(frozen=True)
+class DecodeProfile:
+    name: str
+    window_ms: int = 800
+    overlap_ms: int = 120
+    vad_rms_threshold: float = 0.008
+    vad_rms_relaxed: float = 0.003
+    skip_tail_below_ms: int = 120
+    max_tail_decode_ms: int = 2200
+    full_finalize_max_seconds: float = 30.0
+    punctuation: PunctuationSettings = field(default_factory=PunctuationSettings)
+
+    def to_dict(self) -> Dict[str, object]:
+        return dataclasses.asdict(self)
+
+
+def _coerce(key: str, value: object, current: object) -> object:
+    if isinstance(current, bool):
+        if not isinstance(value, bool):
+            raise ValueError(f"{key} must be true or false")
+        return value
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{key} must be a number")
+    # json accepts NaN, Infinity and 1e400; none of them make sense as a decode parameter or weight.
+    try:
+        number = float(value)
+    except OverflowError:
+        number = math.inf
+    if not math.isfinite(number):
+        raise ValueError(f"{key} must be a finite number")
+    if isinstance(current, int):
+        if float(value) != int(value):
+            raise ValueError(f"{key} must be an integer")
+        return int(value)
+    return float(value)
+
+
+def _overrides(target: object, data: Dict[str, object], prefix: str = "") -> Dict[str, object]:
+    known = {f.name for f in dataclasses.fields(target)} - {"name", "punctuation"}
+    changes = {}
+    for key, value in data.items():
+        if key not in known:
+            raise ValueError(f"Unknown decode profile field: {prefix}{key}")
+        changes[key] = _coerce(prefix + key, value, getattr(target, key))
+    return changes
+
+
+def _validate(profile: DecodeProfile) -> None:
+    if profile.window_ms < 100:
+        raise ValueError(f"{profile.name}: window_ms must be at least 100")
+    if not 0 <= profile.overlap_ms < profile.window_ms:
+        raise ValueError(f"{profile.name}: overlap_ms must be between 0 and window_ms")
+    if profile.vad_rms_threshold < 0 or profile.vad_rms_relaxed < 0:
+        raise ValueError(f"{profile.name}: VAD thresholds must not be negative")
+    if profile.skip_tail_below_ms < 0 or profile.max_tail_decode_ms <= 0:
+        raise ValueError(f"{profile.name}: tail limits must be positive")
+    if profile.full_finalize_max_seconds <= 0:
+        raise ValueError(f"{profile.name}: full_finalize_max_seconds must be positive")
+    punctuation = profile.punctuation
+    if punctuation.num_beams < 1 or punctuation.min_words < 1 or punctuation.max_audio_seconds <= 0:
+        raise ValueError(f"{profile.name}: punctuation num_beams, min_words and max_audio_seconds must be positive")
+
+
+def build_profile(name: str, data: Dict[str, object], base: DecodeProfile) -> DecodeProfile:
+    if not _NAME_RE.match(name or ""):
+        raise ValueError(f"Invalid decode profile name: {name!r}")
+    if not isinstance(data, dict):
+        raise ValueError(f"{name}: profile must be an object")
+
+    data = dict(data)
+    punctuation_data = data.pop("punctuation", {}) or {}
+    if not isinstance(punctuation_data, dict):
+        raise ValueError(f"{name}: punctuation must be an object")
+    data.pop("base", None)
+
+    punctuation = dataclasses.replace(
+        base.punctuation, **_overrides(base.punctuation, punctuation_data, prefix="punctuation.")
+    )
+    profile = dataclasses.replace(base, name=name, punctuation=punctuation, **_overrides(base, data))
+    _validate(profile)
+    return profile
+
+
+# Named decode profiles plus the rule for handing them to new sessions: an explicit
+# session.start.decode_profile wins, then a weighted random A/B split, then the active profile.
+class DecodeProfileRegistry:
+    def __init__(self, logger: LoggerService, default: DecodeProfile):
+        self.logger = logger
+        self.default_name = default.name
+        self._profiles: Dict[str, DecodeProfile] = {default.name: default}
+        self._active = default.name
+        self._weights: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    def load_file(self, path: str) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            self.apply(json.load(f))
+
+    def apply(self, data: Dict[str, object]) -> None:
+        # Accepts {"profiles": {name: {field: value, "base": name}}, "remove": [names],
+        # "active": name, "weights": {name: weight}}; everything is validated before anything changes.
+        if not isinstance(data, dict):
+            raise ValueError("Decode profile update must be an object")
+        unknown = set(data) - {"profiles", "remove", "active", "weights"}
+        if unknown:
+            raise ValueError(f"Unknown decode profile update keys: {', '.join(sorted(unknown))}")
+
+        with self._lock:
+            profiles = dict(self._profiles)
+            active = self._active
+            weights = dict(self._weights)
+
+            removed = data.get("remove", []) or []
+            if not isinstance(removed, list) or not all(isinstance(name, str) for name in removed):
+                raise ValueError("remove must be a list of profile names")
+            for name in removed:
+                if name == self.default_name:
+                    raise ValueError(f"Cannot remove the {self.default_name} decode profile")
+                profiles.pop(name, None)
+                weights.pop(name, None)
+
+            definitions = data.get("profiles", {}) or {}
+            if not isinstance(definitions, dict):
+                raise ValueError("profiles must be an object keyed by profile name")
+            for name, definition in definitions.items():
+                base_name = definition.get("base", self.default_name) if isinstance(definition, dict) else self.default_name
+                base = profiles.get(base_name)
+                if base is None:
+                    raise ValueError(f"{name}: unknown base profile {base_name!r}")
+                profiles[name] = build_profile(name, definition, base)
+
+            if "weights" in data:
+                raw_weights = data.get("weights") or {}
+                if not isinstance(raw_weights, dict):
+                    raise ValueError("weights must be an object keyed by profile name")
+                weights = {}
+                for name, weight in raw_weights.items():
+                    weight = _coerce(f"weights.{name}", weight, 0.0)
+                    if weight < 0:
+                        raise ValueError(f"weights.{name} must not be negative")
+                    if weight > 0:
+                        weights[name] = weight
+                if not math.isfinite(sum(weights.values())):
+                    raise ValueError("weights must add up to a finite number")
+
+            if data.get("active") is not None:
+                active = str(data["active"])
+
+            if active not in profiles:
+                raise ValueError(f"Unknown active decode profile: {active!r}")
+            missing = [name for name in weights if name not in profiles]
+            if missing:
+                raise ValueError(f"A/B weights reference unknown decode profiles: {', '.join(missing)}")
+
+            self._profiles = profiles
+            self._active = active
+            self._weights = weights
+
+        self.logger.info(
+            f"Decode profiles updated: profiles={sorted(profiles)} active={active} "
+            f"weights={weights if weights else 'off'}"
+        )
+
+    def get(self, name: str) -> Optional[DecodeProfile]:
+        with self._lock:
+            return self._profiles.get(name)
+
+    def assign(self, requested: str = "") -> DecodeProfile:
+        with self._lock:
+            if requested:
+                profile = self._profiles.get(requested)
+                if profile is not None:
+                    return profile
+                self.logger.warning(f"Unknown decode profile requested ({requested}); using assignment rules.")
+            if self._weights:
+                names: List[str] = list(self._weights)
+                chosen = self._random.choices(names, weights=[self._weights[n] for n in names])[0]
+                return self._profiles[chosen]
+            return self._profiles[self._active]
+
+    def describe(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "active": self._active,
+                "weights": dict(self._weights),
+                "profiles": {name: profile.to_dict() for name, profile in self._profiles.items()},
+            }
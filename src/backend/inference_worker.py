@@ -0,0 +1,435 @@
+import atexit
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from logger_service import LoggerService
+
+
+PRIORITY_FINAL = 0
+PRIORITY_PARTIAL = 1
+PRIORITY_STOP = 99
+
+# Model loads can include a first-run download, so they get their own (much longer) timeout.
+WARMUP_KINDS = frozenset({"warmup_whisper", "load_punctuation"})
+
+
+class InferenceError(RuntimeError):
+    pass
+
+
+class WorkerCrashed(InferenceError):
+    pass
+
+
+@dataclass
+class InferenceJob:
+    kind: str
+    payload: Dict[str, object]
+    audio: Optional[np.ndarray]
+    future: Future
+    attempts: int = 0
+    submitted_at: float = 0.0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+
+# Runs inside the worker process: owns the models and never touches session state.
+class _WorkerHandlers:
+    def __init__(self, logger: LoggerService):
+        self.logger = logger
+        self._punctuation = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._models: Dict[str, object] = {}
+
+    def _use_model(self, model_path: str):
+        # mlx_whisper.ModelHolder caches a single model; keep every model we have loaded resident
+        # and swap the holder so alternating partial/final models never reload weights.
+        import mlx.core as mx
+        from mlx_whisper.transcribe import ModelHolder
+
+        model = self._models.get(model_path)
+        if model is None:
+            model = ModelHolder.get_model(model_path, mx.float16)
+            self._models[model_path] = model
+            self.logger.info(f"Inference worker loaded model {model_path} (resident={len(self._models)}).")
+        ModelHolder.model = model
+        ModelHolder.model_path = model_path
+        return model
+
+    def _array(self, payload: Dict[str, object]) -> np.ndarray:
+        name = payload["shm_name"]
+        if self._shm is None or self._shm.name != name:
+            if self._shm is not None:
+                self._shm.close()
+            self._shm = shared_memory.SharedMemory(name=name)
+        return np.ndarray(tuple(payload["shape"]), dtype=np.float32, buffer=self._shm.buf)
+
+    def _punctuation_service(self):
+        if self._punctuation is None:
+            from punctuation_service import PunctuationService
+
+            self._punctuation = PunctuationService(self.logger)
+        return self._punctuation
+
+    def handle(self, kind: str, payload: Dict[str, object]) -> object:
+        if kind == "warmup_whisper":
+            import mlx_whisper
+
+            model = self._use_model(payload["model_path"])
+
+            mlx_whisper.transcribe(
+                np.zeros(16000, dtype=np.float32),
+                path_or_hf_repo=payload["model_path"],
+                temperature=0.0,
+                condition_on_previous_text=False,
+                language="en",
+            )
+            # The parent builds log-mel features with this bin count (80 for tiny..large-v2, 128 for v3).
+            return {"n_mels": int(model.dims.n_mels)}
+
+        if kind == "transcribe":
+            import mlx_whisper
+
+            model = self._use_model(payload["model_path"])
+            audio = payload["file_path"] if "file_path" in payload else self._array(payload)
+            try:
+                result = mlx_whisper.transcribe(
+                    audio,
+                    path_or_hf_repo=payload["model_path"],
+                    temperature=0.0,
+                    condition_on_previous_text=False,
+                    language=payload.get("language") or "en",
+                )
+            finally:
+                del audio
+            return {"text": result.get("text", ""), "n_mels": int(model.dims.n_mels)}
+
+        if kind == "transcribe_features":
+            import mlx.core as mx
+            from mlx_whisper.decoding import DecodingOptions
+
+            model = self._use_model(payload["model_path"])
+            features = self._array(payload)
+            try:
+                if features.shape[1] != model.dims.n_mels:
+                    raise InferenceError(
+                        f"feature n_mels={features.shape[1]} does not match model n_mels={model.dims.n_mels}"
+                    )
+                mel = mx.array(features, dtype=mx.float16)
+            finally:
+                del features
+            options = DecodingOptions(
+                task="transcribe",
+                language=payload.get("language") or "en",
+                temperature=0.0,
+                without_timestamps=True,
+                fp16=True,
+            )
+            result = model.decode(mel, options)
+            # model.decode has no silence gate; apply transcribe()'s defaults (no_speech_threshold=0.6,
+            # logprob_threshold=-1.0) so silent windows stay empty like on the raw-audio path.
+            if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+                return {"text": "", "n_mels": int(model.dims.n_mels)}
+            return {"text": result.text, "n_mels": int(model.dims.n_mels)}
+
+        if kind == "load_punctuation":
+            service = self._punctuation_service()
+            service.preload_model()
+            return service._model_loaded
+
+        if kind == "restore_punctuation":
+            service = self._punctuation_service()
+            service.preload_model()
+            audio = self._array(payload)
+            try:
+                return service.run_restorer(
+                    audio,
+                    str(payload["transcript"]),
+                    int(payload["sampling_rate"]),
+                    int(payload.get("num_beams", 0)) or None,
+                )
+            finally:
+                del audio
+
+        raise InferenceError(f"Unknown inference job kind: {kind}")
+
+
+def worker_main(conn) -> None:
+    logger = LoggerService()
+    handlers = _WorkerHandlers(logger)
+    logger.info(f"Inference worker started (pid={os.getpid()}).")
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        job_id, kind, payload = message
+        try:
+            conn.send((job_id, True, handlers.handle(kind, payload)))
+        except Exception as e:
+            conn.send((job_id, False, f"{type(e).__name__}: {e}"))
+
+
+# One supervised worker process plus the parent-owned shared-memory segment used to hand it audio.
+class _WorkerSlot:
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        self.restarts = 0
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+
+class InferencePool:
+    def __init__(
+        self,
+        logger: LoggerService,
+        workers: int = 1,
+        job_timeout_s: float = 180.0,
+        warmup_timeout_s: float = 1800.0,
+        max_retries: int = 1,
+    ):
+        self.logger = logger
+        self.job_timeout_s = job_timeout_s
+        self.warmup_timeout_s = warmup_timeout_s
+        self.max_retries = max_retries
+        self._ctx = multiprocessing.get_context("spawn")
+        # (priority, sequence, job): lower priority runs first, FIFO within a priority.
+        self._jobs: "queue.PriorityQueue[Tuple[int, int, Optional[InferenceJob]]]" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._slots = [_WorkerSlot(i) for i in range(max(1, workers))]
+        self._warmups: List[Tuple[str, Dict[str, object]]] = []
+        self._warmups_lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        self._threads: List[threading.Thread] = []
+        self._started = False
+        self._stopping = False
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+            atexit.register(self.stop)
+            for slot in self._slots:
+                thread = threading.Thread(target=self._dispatch_loop, args=(slot,), daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stopping = True
+        for _ in self._slots:
+            self._jobs.put((PRIORITY_STOP, next(self._sequence), None))
+        for slot in self._slots:
+            self._terminate(slot)
+            if slot.shm is not None:
+                slot.shm.close()
+                slot.shm.unlink()
+                slot.shm = None
+
+    def add_warmup(self, kind: str, payload: Dict[str, object]) -> None:
+        # Replayed on every (re)started worker before it takes jobs.
+        with self._warmups_lock:
+            if (kind, payload) not in self._warmups:
+                self._warmups.append((kind, payload))
+
+    def submit(
+        self,
+        kind: str,
+        payload: Dict[str, object],
+        audio: Optional[np.ndarray] = None,
+        priority: int = PRIORITY_FINAL,
+    ) -> Future:
+        return self._enqueue(kind, payload, audio, priority).future
+
+    def _enqueue(
+        self, kind: str, payload: Dict[str, object], audio: Optional[np.ndarray], priority: int
+    ) -> InferenceJob:
+        self.start()
+        if audio is not None:
+            audio = np.ascontiguousarray(audio, dtype=np.float32)
+        job = InferenceJob(
+            kind=kind, payload=dict(payload), audio=audio, future=Future(), submitted_at=time.perf_counter()
+        )
+        self._jobs.put((priority, next(self._sequence), job))
+        return job
+
+    def call(
+        self,
+        kind: str,
+        payload: Dict[str, object],
+        audio: Optional[np.ndarray] = None,
+        priority: int = PRIORITY_FINAL,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> object:
+        job = self._enqueue(kind, payload, audio, priority)
+        try:
+            return job.future.result()
+        finally:
+            if timings is not None and job.started_at:
+                timings["submitted_at"] = job.submitted_at
+                timings["started_at"] = job.started_at
+                timings["queue_s"] = job.started_at - job.submitted_at
+                timings["run_s"] = (job.finished_at or time.perf_counter()) - job.started_at
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "workers": len(self._slots),
+            "alive": sum(1 for s in self._slots if s.alive()),
+            "restarts": sum(s.restarts for s in self._slots),
+            "queued_jobs": self._jobs.qsize(),
+        }
+
+    def _spawn(self, slot: _WorkerSlot) -> None:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=worker_main,
+            args=(child_conn,),
+            name=f"puma-inference-{slot.index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        slot.process = process
+        slot.conn = parent_conn
+        self.logger.info(f"Inference worker {slot.index} spawned (pid={process.pid}).")
+
+        with self._warmups_lock:
+            warmups = list(self._warmups)
+        for kind, payload in warmups:
+            t0 = time.time()
+            try:
+                self._exchange(slot, kind, payload, self.warmup_timeout_s)
+                self.logger.info(
+                    f"Inference worker {slot.index} warmup {kind} done took_ms={int((time.time()-t0)*1000)}"
+                )
+            except WorkerCrashed:
+                raise
+            except Exception as e:
+                self.logger.warning(f"Inference worker {slot.index} warmup {kind} failed: {e}")
+
+    def _terminate(self, slot: _WorkerSlot) -> None:
+        if slot.conn is not None:
+            try:
+                slot.conn.close()
+            except OSError:
+                pass
+            slot.conn = None
+        if slot.process is not None:
+            if slot.process.is_alive():
+                slot.process.kill()
+            slot.process.join(timeout=5)
+            slot.process = None
+
+    def _ensure_shm(self, slot: _WorkerSlot, nbytes: int) -> shared_memory.SharedMemory:
+        if slot.shm is None or slot.shm.size < nbytes:
+            if slot.shm is not None:
+                slot.shm.close()
+                slot.shm.unlink()
+            size = max(nbytes, 16000 * 4 * 30)
+            if slot.shm is not None:
+                size = max(size, slot.shm.size * 2)
+            slot.shm = shared_memory.SharedMemory(create=True, size=size)
+        return slot.shm
+
+    def _exchange(self, slot: _WorkerSlot, kind: str, payload: Dict[str, object], timeout_s: float) -> object:
+        job_id = next(self._job_ids)
+        try:
+            slot.conn.send((job_id, kind, payload))
+        except (OSError, BrokenPipeError) as e:
+            raise WorkerCrashed(f"inference worker {slot.index} unreachable: {e}")
+
+        deadline = time.time() + timeout_s
+        while True:
+            try:
+                if slot.conn.poll(0.25):
+                    reply_id, ok, result = slot.conn.recv()
+                    if reply_id != job_id:
+                        continue
+                    if not ok:
+                        raise InferenceError(result)
+                    return result
+            except (EOFError, OSError):
+                raise WorkerCrashed(f"inference worker {slot.index} exited during {kind}")
+            if not slot.alive():
+                code = slot.process.exitcode if slot.process is not None else None
+                raise WorkerCrashed(f"inference worker {slot.index} exited during {kind} (exitcode={code})")
+            if time.time() > deadline:
+                raise WorkerCrashed(f"inference worker {slot.index} timed out after {timeout_s:.0f}s on {kind}")
+
+    def _run_job(self, slot: _WorkerSlot, job: InferenceJob) -> None:
+        job.started_at = time.perf_counter()
+        while True:
+            job.attempts += 1
+            try:
+                if not slot.alive():
+                    self._respawn(slot)
+
+                payload = job.payload
+                if job.audio is not None:
+                    shm = self._ensure_shm(slot, job.audio.nbytes)
+                    np.ndarray(job.audio.shape, dtype=np.float32, buffer=shm.buf)[...] = job.audio
+                    payload = dict(payload, shm_name=shm.name, shape=list(job.audio.shape))
+
+                timeout_s = self.warmup_timeout_s if job.kind in WARMUP_KINDS else self.job_timeout_s
+                result = self._exchange(slot, job.kind, payload, timeout_s)
+                job.finished_at = time.perf_counter()
+                job.future.set_result(result)
+                return
+            except WorkerCrashed as e:
+                slot.restarts += 1
+                self.logger.error(
+                    f"{e}; restarting worker (restarts={slot.restarts}), attempt {job.attempts}/{self.max_retries + 1}"
+                )
+                self._terminate(slot)
+                if job.attempts > self.max_retries or self._stopping:
+                    job.future.set_exception(e)
+                    return
+            except Exception as e:
+                job.future.set_exception(e)
+                return
+
+    def _respawn(self, slot: _WorkerSlot) -> None:
+        # A process that existed but is gone died outside a job (e.g. killed while idle); count it too.
+        if slot.process is not None:
+            slot.restarts += 1
+            self.logger.error(
+                f"inference worker {slot.index} exited while idle (exitcode={slot.process.exitcode}); "
+                f"restarting worker (restarts={slot.restarts})"
+            )
+        self._terminate(slot)
+        self._spawn(slot)
+
+    def _dispatch_loop(self, slot: _WorkerSlot) -> None:
+        while True:
+            try:
+                _, _, job = self._jobs.get(timeout=1.0)
+            except queue.Empty:
+                # Bring idle workers back (with their warm models) before the next job needs them.
+                if slot.process is not None and not slot.alive() and not self._stopping:
+                    try:
+                        self._respawn(slot)
+                    except Exception as e:
+                        self.logger.error(f"inference worker {slot.index} respawn failed: {e}")
+                        self._terminate(slot)
+                continue
+            if job is None:
+                return
+            self._run_job(slot, job)
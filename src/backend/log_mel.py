@@ -0,0 +1,136 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+# Whisper front-end constants (16 kHz, 25 ms Hann window, 10 ms hop, 30 s context).
+SAMPLE_RATE = 16000
+N_FFT = 400
+HOP_LENGTH = 160
+N_FRAMES = 3000
+SILENCE_LOG_MEL = -10.0
+
+_filters_cache: Dict[int, np.ndarray] = {}
+_filters_lock = threading.Lock()
+_window = np.hanning(N_FFT + 1)[:-1].astype(np.float32)
+
+
+def _hz_to_mel(freqs: np.ndarray) -> np.ndarray:
+    # Slaney scale: linear below 1 kHz, logarithmic above (librosa default, as used by Whisper).
+    freqs = np.asarray(freqs, dtype=np.float64)
+    mels = freqs / (200.0 / 3)
+    log_region = freqs >= 1000.0
+    mels[log_region] = 15.0 + np.log(freqs[log_region] / 1000.0) / (np.log(6.4) / 27.0)
+    return mels
+
+
+def _mel_to_hz(mels: np.ndarray) -> np.ndarray:
+    mels = np.asarray(mels, dtype=np.float64)
+    freqs = mels * (200.0 / 3)
+    log_region = mels >= 15.0
+    freqs[log_region] = 1000.0 * np.exp((np.log(6.4) / 27.0) * (mels[log_region] - 15.0))
+    return freqs
+
+
+def mel_filters(n_mels: int) -> np.ndarray:
+    with _filters_lock:
+        cached = _filters_cache.get(n_mels)
+        if cached is not None:
+            return cached
+
+        fft_freqs = np.fft.rfftfreq(N_FFT, 1.0 / SAMPLE_RATE)
+        mel_min, mel_max = _hz_to_mel(np.array([0.0, SAMPLE_RATE / 2.0]))
+        mel_points = _mel_to_hz(np.linspace(mel_min, mel_max, n_mels + 2))
+        fdiff = np.diff(mel_points)
+        ramps = mel_points[:, None] - fft_freqs[None, :]
+        lower = -ramps[:-2] / fdiff[:-1, None]
+        upper = ramps[2:] / fdiff[1:, None]
+        weights = np.maximum(0.0, np.minimum(lower, upper))
+        weights *= (2.0 / (mel_points[2:n_mels + 2] - mel_points[:n_mels]))[:, None]
+
+        filters = weights.astype(np.float32)
+        _filters_cache[n_mels] = filters
+        return filters
+
+
+def normalize_log_mel(raw: np.ndarray) -> np.ndarray:
+    return (np.maximum(raw, raw.max() - 8.0) + 4.0) / 4.0
+
+
+# Running raw log10-mel buffer for one stream. Frame t is centred on sample t * HOP_LENGTH
+# (reflect-padded at the start, like Whisper's centred STFT) and is only committed once its
+# full window has arrived, so committed frames never change as audio keeps streaming in.
+class StreamingLogMel:
+    def __init__(self, n_mels: int):
+        self.n_mels = n_mels
+        self._filters = mel_filters(n_mels)
+        self._frames = np.empty((0, n_mels), dtype=np.float32)
+        self._count = 0
+
+    @property
+    def committed_frames(self) -> int:
+        return self._count
+
+    def _compute(self, audio: np.ndarray, t0: int, t1: int, audio_end: int) -> np.ndarray:
+        if t1 <= t0:
+            return np.empty((0, self.n_mels), dtype=np.float32)
+        idx = (np.arange(t0, t1)[:, None] * HOP_LENGTH - N_FFT // 2) + np.arange(N_FFT)[None, :]
+        idx = np.abs(idx)
+        valid = idx < audio_end
+        frames = np.where(valid, audio[np.minimum(idx, max(0, audio_end - 1))], 0.0).astype(np.float32)
+        spectrum = np.fft.rfft(frames * _window, axis=1)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+        return np.log10(np.maximum(power @ self._filters.T, 1e-10)).astype(np.float32)
+
+    def update(self, audio: np.ndarray) -> int:
+        total = int(audio.shape[0])
+        if total <= N_FFT // 2:
+            return 0
+        stable = (total - N_FFT // 2) // HOP_LENGTH + 1
+        if stable <= self._count:
+            return 0
+
+        if stable > self._frames.shape[0]:
+            grown = np.empty((max(stable, self._frames.shape[0] * 2, 512), self.n_mels), dtype=np.float32)
+            grown[: self._count] = self._frames[: self._count]
+            self._frames = grown
+
+        self._frames[self._count:stable] = self._compute(audio, self._count, stable, total)
+        added = stable - self._count
+        self._count = stable
+        return added
+
+    def features_for_spans(
+        self, audio: np.ndarray, spans: Iterable[Tuple[int, int]], max_frames: int = N_FRAMES
+    ) -> Optional[np.ndarray]:
+        # Normalised (N_FRAMES, n_mels) features for the concatenation of audio spans, laid out
+        # the way mlx_whisper.transcribe sees a <=30 s clip: zero audio after the end, then padding.
+        total = int(audio.shape[0])
+        parts = []
+        frame_total = 0
+        end = 0
+        for start, length in spans:
+            t0 = max(0, int(start)) // HOP_LENGTH
+            end = min(total, int(start) + int(length))
+            t1 = end // HOP_LENGTH
+            if t1 <= t0:
+                continue
+            frame_total += t1 - t0
+            if frame_total > max_frames:
+                return None
+            committed_end = min(t1, self._count)
+            if committed_end > t0:
+                parts.append(self._frames[t0:committed_end])
+            if t1 > committed_end:
+                parts.append(self._compute(audio, max(t0, committed_end), t1, end))
+
+        if not parts:
+            return None
+
+        # Frames straddling the end still see the last samples (then zeros), as in a padded decode.
+        t_tail = min(-(-(end + N_FFT // 2) // HOP_LENGTH), end // HOP_LENGTH + max_frames - frame_total)
+        if t_tail > end // HOP_LENGTH:
+            parts.append(self._compute(audio, end // HOP_LENGTH, t_tail, end))
+            frame_total += t_tail - end // HOP_LENGTH
+        parts.append(np.full((max_frames - frame_total, self.n_mels), SILENCE_LOG_MEL, dtype=np.float32))
+        return normalize_log_mel(np.concatenate(parts)).astype(np.float32)
@@ -1,15 +1,25 @@
+import os
 import threading
 from logger_service import LoggerService
 from audio_service import AudioService
+from profiling_service import ProfilingService
 from server import ServerService
 
 PORT = 8111
+UNIX_SOCKET_PATH = os.getenv("PUMA_UNIX_SOCKET", "")
 
 def run():
     # 1. Initialize DI Services
     logger = LoggerService()
     audio_service = AudioService(logger)
-    server = ServerService(port=PORT, audio_service=audio_service, logger=logger)
+    profiling_service = ProfilingService(logger)
+    server = ServerService(
+        port=PORT,
+        audio_service=audio_service,
+        logger=logger,
+        unix_socket_path=os.path.expanduser(UNIX_SOCKET_PATH) if UNIX_SOCKET_PATH else None,
+        profiling_service=profiling_service,
+    )
 
     # 2. Start Warmup Background Side Effect
     threading.Thread(target=audio_service.preload_models, daemon=True).start()
@@ -0,0 +1,59 @@
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+from logger_service import LoggerService
+
+
+class ProfilingService:
+    def __init__(self, logger: LoggerService):
+        self.logger = logger
+        self._busy = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        return self._busy.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._busy.release()
+
+    def sample_stacks(self, seconds: float, interval_s: float = 0.005) -> Counter:
+        # Wall-clock sampler over every thread in the daemon (event loop and to_thread workers).
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        counts: Counter = Counter()
+        deadline = time.perf_counter() + seconds
+        samples = 0
+        while time.perf_counter() < deadline:
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(tid, f"thread-{tid}"))
+                counts[";".join(reversed(stack))] += 1
+            samples += 1
+            time.sleep(interval_s)
+        self.logger.info(f"Sampling profile captured ({seconds:.1f}s, {samples} samples, {len(counts)} stacks).")
+        return counts
+
+    def render_collapsed(self, counts: Counter) -> str:
+        # Brendan Gregg collapsed-stack format: flamegraph.pl, speedscope and inferno read it directly.
+        return "\n".join(f"{stack} {count}" for stack, count in counts.most_common()) + "\n"
+
+    def summarize(self, counts: Counter, limit: int = 40) -> Dict[str, object]:
+        total = sum(counts.values())
+        leaf_counts: Counter = Counter()
+        for stack, count in counts.items():
+            leaf_counts[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "samples": total,
+            "top_self": [
+                {"frame": frame, "samples": count, "pct": round(100.0 * count / max(1, total), 1)}
+                for frame, count in leaf_counts.most_common(limit)
+            ],
+        }
@@ -2,17 +2,30 @@ import os
 import re
 import threading
 from collections import Counter
+from dataclasses import dataclass
 from difflib import SequenceMatcher
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import numpy as np
 
 from logger_service import LoggerService
 
 
+# Per-call restore thresholds; decode profiles override the env defaults with these.
+@dataclass(frozen=True)
+class PunctuationSettings:
+    enabled: bool = True
+    num_beams: int = 1
+    min_words: int = 8
+    max_audio_seconds: float = 75.0
+    min_log_prob: float = -80.0
+    min_log_prob_per_word: float = -2.0
+
+
 class PunctuationService:
-    def __init__(self, logger: LoggerService):
+    def __init__(self, logger: LoggerService, inference=None):
         self.logger = logger
+        self.inference = inference
         self.enabled = os.getenv("PUMA_PUNCTUATION_ENABLED", "1").lower() not in {"0", "false", "no", "off"}
         self.model_id = os.getenv("PUMA_PUNCTUATION_MODEL", "openai/whisper-tiny.en")
         self.num_beams = max(1, int(os.getenv("PUMA_PUNCTUATION_BEAMS", "1")))
@@ -50,6 +63,18 @@ class PunctuationService:
             if not self.enabled or self._model_loaded or self._model_failed:
                 return
 
+            if self.inference is not None:
+                try:
+                    self._model_loaded = bool(self.inference.call("load_punctuation", {}))
+                except Exception as e:
+                    self.logger.warning(f"Inference worker could not load punctuation model: {e}")
+                    self._model_loaded = False
+                if self._model_loaded:
+                    self.inference.add_warmup("load_punctuation", {})
+                else:
+                    self._model_failed = True
+                return
+
             try:
                 from speechbox import PunctuationRestorer
 
@@ -74,6 +99,16 @@ class PunctuationService:
     def preload_model(self) -> None:
         self._load_model()
 
+    def default_settings(self) -> PunctuationSettings:
+        return PunctuationSettings(
+            enabled=self.enabled,
+            num_beams=self.num_beams,
+            min_words=self.min_words,
+            max_audio_seconds=self.max_audio_seconds,
+            min_log_prob=self.min_log_prob,
+            min_log_prob_per_word=self.min_log_prob_per_word,
+        )
+
     def _normalize_words(self, text: str) -> List[str]:
         reduced = re.sub(r"[^a-z0-9']+", " ", (text or "").lower()).strip()
         if not reduced:
@@ -103,8 +138,25 @@ class PunctuationService:
         seq_ratio = SequenceMatcher(None, source_flat, candidate_flat).ratio()
         return seq_ratio >= 0.85
 
-    def restore(self, audio: np.ndarray, sampling_rate: int, transcript: str) -> Optional[str]:
-        if not self.enabled:
+    def run_restorer(
+        self, audio: np.ndarray, transcript: str, sampling_rate: int, num_beams: Optional[int] = None
+    ) -> Tuple[str, float]:
+        if not self._model_loaded or self._restorer is None:
+            raise RuntimeError("punctuation model is not loaded")
+        with self._lock:
+            restored, log_prob = self._restorer(
+                audio,
+                transcript,
+                sampling_rate=sampling_rate,
+                num_beams=num_beams or self.num_beams,
+            )
+        return restored, float(log_prob)
+
+    def restore(
+        self, audio: np.ndarray, sampling_rate: int, transcript: str, settings: Optional[PunctuationSettings] = None
+    ) -> Optional[str]:
+        settings = settings or self.default_settings()
+        if not self.enabled or not settings.enabled:
             return None
 
         normalized = " ".join((transcript or "").split()).strip()
@@ -112,7 +164,7 @@ class PunctuationService:
             return None
 
         words = normalized.split()
-        if len(words) < self.min_words:
+        if len(words) < settings.min_words:
             return None
 
         if audio is None or getattr(audio, "size", 0) == 0:
@@ -120,16 +172,16 @@ class PunctuationService:
 
         safe_rate = max(1, int(sampling_rate))
         duration_seconds = float(audio.shape[0]) / float(safe_rate)
-        if duration_seconds > self.max_audio_seconds:
+        if duration_seconds > settings.max_audio_seconds:
             self.logger.info(
-                f"Skipping local punctuation model (duration {duration_seconds:.1f}s > {self.max_audio_seconds:.1f}s)."
+                f"Skipping local punctuation model (duration {duration_seconds:.1f}s > {settings.max_audio_seconds:.1f}s)."
             )
             return None
 
         if not self._model_loaded and not self._model_failed:
             self._load_model()
 
-        if not self._model_loaded or self._restorer is None:
+        if not self._model_loaded or (self._restorer is None and self.inference is None):
             return None
 
         audio_f32 = np.asarray(audio, dtype=np.float32)
@@ -137,13 +189,14 @@ class PunctuationService:
             audio_f32 = audio_f32.reshape(-1)
 
         try:
-            with self._lock:
-                restored, log_prob = self._restorer(
+            if self.inference is not None:
+                restored, log_prob = self.inference.call(
+                    "restore_punctuation",
+                    {"transcript": normalized, "sampling_rate": safe_rate, "num_beams": settings.num_beams},
                     audio_f32,
-                    normalized,
-                    sampling_rate=safe_rate,
-                    num_beams=self.num_beams,
                 )
+            else:
+                restored, log_prob = self.run_restorer(audio_f32, normalized, safe_rate, settings.num_beams)
         except Exception as e:
             self.logger.warning(f"Local punctuation inference failed, using fallback punctuation. Error: {e}")
             return None
@@ -154,7 +207,7 @@ class PunctuationService:
 
         log_prob_value = float(log_prob)
         log_prob_per_word = log_prob_value / float(max(1, len(words)))
-        if log_prob_value < self.min_log_prob or log_prob_per_word < self.min_log_prob_per_word:
+        if log_prob_value < settings.min_log_prob or log_prob_per_word < settings.min_log_prob_per_word:
             self.logger.warning(
                 "Local punctuation output rejected by confidence threshold "
                 f"(log_prob={log_prob_value:.3f}, per_word={log_prob_per_word:.3f})."
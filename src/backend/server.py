@@ -1,22 +1,86 @@
 import asyncio
 import json
 import os
+from typing import Optional
+
 from aiohttp import web
 
 from audio_service import AudioService
 from logger_service import LoggerService
+from profiling_service import ProfilingService
 
 
 class ServerService:
-    def __init__(self, port: int, audio_service: AudioService, logger: LoggerService):
+    def __init__(
+        self,
+        port: int,
+        audio_service: AudioService,
+        logger: LoggerService,
+        unix_socket_path: Optional[str] = None,
+        profiling_service: Optional[ProfilingService] = None,
+    ):
         self.port = port
         self.audio_service = audio_service
         self.logger = logger
+        self.unix_socket_path = unix_socket_path
+        self.profiling_service = profiling_service or ProfilingService(logger)
 
     async def _handle_models(self, request: web.Request) -> web.Response:
         models = self.audio_service.get_available_models()
         return web.json_response({"status": "success", "models": models})
 
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        metrics = self.audio_service.get_metrics()
+        return web.json_response({"status": "success", "metrics": metrics})
+
+    async def _handle_get_profiles(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "success", **self.audio_service.get_decode_profiles()})
+
+    async def _handle_update_profiles(self, request: web.Request) -> web.Response:
+        try:
+            data = await request.json()
+        except Exception:
+            return web.json_response({"status": "error", "error": "Invalid JSON payload"}, status=400)
+
+        try:
+            file_path = data.get("file") if isinstance(data, dict) else None
+            if file_path:
+                if len(data) > 1:
+                    raise ValueError("file cannot be combined with inline profile updates")
+                if not os.path.exists(file_path):
+                    raise ValueError("Invalid file path")
+                profiles = await asyncio.to_thread(self.audio_service.load_decode_profiles, file_path)
+            else:
+                profiles = self.audio_service.update_decode_profiles(data)
+        except (OSError, ValueError) as e:
+            return web.json_response({"status": "error", "error": str(e)}, status=400)
+        return web.json_response({"status": "success", **profiles})
+
+    async def _handle_debug_profile(self, request: web.Request) -> web.Response:
+        try:
+            seconds = float(request.query.get("seconds", "5"))
+        except ValueError:
+            return web.json_response({"status": "error", "error": "seconds must be a number"}, status=400)
+        seconds = min(120.0, max(0.5, seconds))
+        output_format = request.query.get("format", "collapsed")
+
+        if not self.profiling_service.try_acquire():
+            return web.json_response({"status": "error", "error": "A profile is already running"}, status=409)
+        try:
+            counts = await asyncio.to_thread(self.profiling_service.sample_stacks, seconds)
+            if output_format == "json":
+                return web.json_response({"status": "success", "profile": self.profiling_service.summarize(counts)})
+            return web.Response(text=self.profiling_service.render_collapsed(counts), content_type="text/plain")
+        finally:
+            self.profiling_service.release()
+
+    async def _handle_debug_trace(self, request: web.Request) -> web.Response:
+        session_id = request.match_info["session_id"]
+        trace = self.audio_service.get_trace(session_id)
+        if trace is None:
+            return web.json_response({"status": "error", "error": f"No trace for session {session_id}"}, status=404)
+        return web.json_response(trace)
+
     async def _handle_transcribe(self, request: web.Request) -> web.Response:
         try:
             data = await request.json()
@@ -35,6 +99,7 @@ class ServerService:
         await ws.prepare(request)
 
         active_session_id = None
+        open_session_ids = set()
         self.logger.info("WS client connected: /stream")
 
         try:
@@ -57,6 +122,10 @@ class ServerService:
                         sample_rate = int(payload.get("sample_rate", 16000))
                         language = payload.get("language", "en")
                         model = payload.get("model", "")
+                        partial_policy = payload.get("partial_model_policy", "")
+                        trace = payload.get("trace")
+                        capture = payload.get("capture")
+                        decode_profile = payload.get("decode_profile", "")
 
                         if not session_id:
                             await ws.send_json({
@@ -66,15 +135,59 @@ class ServerService:
                             })
                             continue
 
-                        await asyncio.to_thread(
+                        # JSON booleans only: bool("false") would silently turn tracing/capture on.
+                        invalid = [
+                            f"{name} must be true or false"
+                            for name, value in (("trace", trace), ("capture", capture))
+                            if value is not None and not isinstance(value, bool)
+                        ]
+                        invalid += [
+                            f"{name} must be a string"
+                            for name, value in (("partial_model_policy", partial_policy), ("decode_profile", decode_profile))
+                            if value is not None and not isinstance(value, str)
+                        ]
+                        if invalid:
+                            await ws.send_json({
+                                "type": "session.error",
+                                "code": "invalid_option",
+                                "message": "; ".join(invalid),
+                            })
+                            continue
+
+                        assigned_profile = await asyncio.to_thread(
                             self.audio_service.create_stream_session,
                             session_id,
                             sample_rate,
                             language,
                             model,
+                            partial_policy,
+                            trace,
+                            capture,
+                            decode_profile,
                         )
                         active_session_id = session_id
-                        await ws.send_json({"type": "session.started", "session_id": session_id})
+                        open_session_ids.add(session_id)
+
+                        shm_name = payload.get("shm_name")
+                        if shm_name:
+                            attached = await asyncio.to_thread(
+                                self.audio_service.attach_audio_ring,
+                                session_id,
+                                shm_name,
+                                int(payload.get("shm_size", 0)),
+                            )
+                            if not attached:
+                                await ws.send_json({
+                                    "type": "session.error",
+                                    "code": "shm_attach_failed",
+                                    "message": f"Could not attach shared audio ring {shm_name}; send pcm16_base64 instead",
+                                })
+
+                        await ws.send_json({
+                            "type": "session.started",
+                            "session_id": session_id,
+                            "decode_profile": assigned_profile,
+                        })
 
                     elif mtype == "audio.chunk":
                         session_id = payload.get("session_id")
@@ -83,20 +196,31 @@ class ServerService:
                         if not session_id:
                             continue
 
-                        pcm = await asyncio.to_thread(self.audio_service.decode_base64_chunk, b64_audio)
-                        partial_text = await asyncio.to_thread(
-                            self.audio_service.append_chunk_and_maybe_decode,
-                            session_id,
-                            pcm,
-                        )
+                        trace = self.audio_service.trace_for(session_id)
+                        with trace.span("chunk.ingest"):
+                            if "shm_offset" in payload:
+                                partial_text = await asyncio.to_thread(
+                                    self.audio_service.append_ring_chunk_and_maybe_decode,
+                                    session_id,
+                                    int(payload["shm_offset"]),
+                                )
+                            else:
+                                with trace.span("chunk.b64decode", chars=len(b64_audio)):
+                                    pcm = await asyncio.to_thread(self.audio_service.decode_base64_chunk, b64_audio)
+                                partial_text = await asyncio.to_thread(
+                                    self.audio_service.append_chunk_and_maybe_decode,
+                                    session_id,
+                                    pcm,
+                                )
 
-                        if partial_text:
-                            await ws.send_json({
-                                "type": "transcript.partial",
-                                "session_id": session_id,
-                                "text": partial_text,
-                                "stability": 0.7,
-                            })
+                            if partial_text:
+                                with trace.span("ws.send.partial"):
+                                    await ws.send_json({
+                                        "type": "transcript.partial",
+                                        "session_id": session_id,
+                                        "text": partial_text,
+                                        "stability": 0.7,
+                                    })
 
                     elif mtype == "session.stop":
                         session_id = payload.get("session_id") or active_session_id
@@ -104,12 +228,18 @@ class ServerService:
                             continue
 
                         result = await asyncio.to_thread(self.audio_service.finalize_stream_session, session_id)
-                        await ws.send_json({
-                            "type": "transcript.final",
-                            "session_id": session_id,
-                            "text": result.get("text", ""),
-                            "latency_ms": result.get("latency_ms", 0),
-                        })
+                        open_session_ids.discard(session_id)
+                        trace = self.audio_service.trace_for(session_id)
+                        with trace.span("ws.send.final"):
+                            await ws.send_json({
+                                "type": "transcript.final",
+                                "session_id": session_id,
+                                "text": result.get("text", ""),
+                                "latency_ms": result.get("latency_ms", 0),
+                                "metrics": result.get("metrics", {}),
+                            })
+                        if trace.enabled:
+                            await asyncio.to_thread(self.audio_service.write_trace, session_id)
 
                     else:
                         await ws.send_json({
@@ -129,6 +259,9 @@ class ServerService:
                 "message": str(e),
             })
         finally:
+            # Sessions never stopped on this socket (disconnects, cancelled taps) still hold rings and buffers.
+            for session_id in open_session_ids:
+                await asyncio.to_thread(self.audio_service.discard_stream_session, session_id)
             self.logger.info("WS client disconnected: /stream")
 
         return ws
@@ -137,6 +270,11 @@ class ServerService:
         app = web.Application()
         app.add_routes([
             web.get("/models", self._handle_models),
+            web.get("/metrics", self._handle_metrics),
+            web.get("/profiles", self._handle_get_profiles),
+            web.post("/profiles", self._handle_update_profiles),
+            web.get("/debug/profile", self._handle_debug_profile),
+            web.get("/debug/trace/{session_id}", self._handle_debug_trace),
             web.post("/transcribe", self._handle_transcribe),
             web.get("/stream", self._handle_stream),
         ])
@@ -148,6 +286,14 @@ class ServerService:
 
         self.logger.info(f"Whisper Puma Daemon (HTTP + WS) running on http://127.0.0.1:{self.port}...")
 
+        if self.unix_socket_path:
+            if os.path.exists(self.unix_socket_path):
+                os.unlink(self.unix_socket_path)
+            unix_site = web.UnixSite(runner, self.unix_socket_path)
+            await unix_site.start()
+            os.chmod(self.unix_socket_path, 0o600)
+            self.logger.info(f"Whisper Puma Daemon (HTTP + WS) also listening on unix:{self.unix_socket_path}")
+
         while True:
             await asyncio.sleep(3600)
 
@@ -0,0 +1,231 @@
+import json
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from logger_service import LoggerService
+
+# File layout: 9-byte header (magic, version, flags) followed by append-only frames of
+# <kind:u8><t:f64 seconds since capture start><length:u32><payload>. With FLAG_ZLIB each payload
+# is deflated on its own, so a capture cut short by a crash still reads up to its last whole frame.
+CAPTURE_MAGIC = b"PUMACAP"
+CAPTURE_VERSION = 1
+CAPTURE_SUFFIX = ".pumacap"
+FLAG_ZLIB = 0x01
+
+FRAME_START = 1
+FRAME_CHUNK = 2
+FRAME_PARTIAL = 3
+FRAME_STOP = 4
+FRAME_FINAL = 5
+
+_HEADER = struct.Struct("<7sBB")
+_FRAME = struct.Struct("<BdI")
+
+
+class CaptureWriter:
+    def __init__(self, path: str, compress: bool, max_bytes: int):
+        self.path = path
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.dropped_chunks = 0
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, FLAG_ZLIB if compress else 0))
+        self.bytes_written = _HEADER.size
+
+    def _write(self, kind: int, payload: bytes) -> None:
+        t = time.perf_counter() - self._origin
+        if self.compress:
+            payload = zlib.compress(payload, 1)
+        with self._lock:
+            if self._file is None:
+                return
+            # Past the quota only audio is dropped, so the capture still ends with its stop/final frames.
+            if kind == FRAME_CHUNK and self.bytes_written + _FRAME.size + len(payload) > self.max_bytes:
+                self.dropped_chunks += 1
+                return
+            self._file.write(_FRAME.pack(kind, t, len(payload)))
+            self._file.write(payload)
+            self.bytes_written += _FRAME.size + len(payload)
+
+    def write_start(self, params: Dict[str, object]) -> None:
+        self._write(FRAME_START, json.dumps(params).encode("utf-8"))
+
+    def write_chunk(self, pcm16_bytes: bytes) -> None:
+        self._write(FRAME_CHUNK, pcm16_bytes)
+
+    def write_partial(self, text: str, decode_ms: float) -> None:
+        self._write(FRAME_PARTIAL, json.dumps({"text": text, "decode_ms": round(decode_ms, 1)}).encode("utf-8"))
+
+    def write_stop(self) -> None:
+        self._write(FRAME_STOP, b"")
+
+    def write_final(self, result: Dict[str, object]) -> None:
+        self._write(FRAME_FINAL, json.dumps(result).encode("utf-8"))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+
+
+@dataclass
+class CaptureRecording:
+    path: str
+    start: Dict[str, object] = field(default_factory=dict)
+    chunks: List[Tuple[float, bytes]] = field(default_factory=list)
+    partials: List[Tuple[float, Dict[str, object]]] = field(default_factory=list)
+    stop_at: Optional[float] = None
+    final: Optional[Dict[str, object]] = None
+    final_at: Optional[float] = None
+    truncated: bool = False
+
+    @property
+    def audio_bytes(self) -> int:
+        return sum(len(chunk) for _, chunk in self.chunks)
+
+
+def load_capture(path: str) -> CaptureRecording:
+    recording = CaptureRecording(path=path)
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"Not a capture file: {path}")
+        magic, version, flags = _HEADER.unpack(header)
+        if magic != CAPTURE_MAGIC or version != CAPTURE_VERSION:
+            raise ValueError(f"Unsupported capture file: {path} (magic={magic!r} version={version})")
+
+        while True:
+            head = f.read(_FRAME.size)
+            if not head:
+                break
+            if len(head) < _FRAME.size:
+                recording.truncated = True
+                break
+            kind, t, length = _FRAME.unpack(head)
+            payload = f.read(length)
+            if len(payload) < length:
+                recording.truncated = True
+                break
+            if flags & FLAG_ZLIB:
+                payload = zlib.decompress(payload)
+
+            if kind == FRAME_START:
+                recording.start = json.loads(payload)
+            elif kind == FRAME_CHUNK:
+                recording.chunks.append((t, payload))
+            elif kind == FRAME_PARTIAL:
+                recording.partials.append((t, json.loads(payload)))
+            elif kind == FRAME_STOP:
+                recording.stop_at = t
+            elif kind == FRAME_FINAL:
+                recording.final = json.loads(payload)
+                recording.final_at = t
+    return recording
+
+
+# Owns the capture directory: names files, tracks which are still being written and keeps the
+# directory under its byte quota by deleting the oldest finished captures first.
+class CaptureStore:
+    def __init__(self, logger: LoggerService, directory: str, max_bytes: int, compress: bool = True):
+        self.logger = logger
+        self.directory = directory
+        self.max_bytes = max(1, int(max_bytes))
+        self.compress = compress
+        self.total_bytes = 0
+        self.files = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._open_paths = set()
+
+    def open(self, session_id: str, params: Dict[str, object]) -> Optional[CaptureWriter]:
+        safe_id = re.sub(r"[^A-Za-z0-9._-]", "_", session_id)[:80] or "session"
+        stem = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_id}")
+        path = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self.enforce_quota()
+            # A session restarted within the same second must not truncate the capture it replaces.
+            with self._lock:
+                path = f"{stem}{CAPTURE_SUFFIX}"
+                attempt = 1
+                while path in self._open_paths or os.path.exists(path):
+                    attempt += 1
+                    path = f"{stem}-{attempt}{CAPTURE_SUFFIX}"
+                self._open_paths.add(path)
+            writer = CaptureWriter(path, self.compress, self.max_bytes)
+        except OSError as e:
+            if path is not None:
+                with self._lock:
+                    self._open_paths.discard(path)
+            self.logger.error(f"Could not open session capture ({session_id}): {e}")
+            return None
+
+        writer.write_start(params)
+        return writer
+
+    def close(self, session_id: str, writer: CaptureWriter) -> None:
+        writer.close()
+        with self._lock:
+            self._open_paths.discard(writer.path)
+        if writer.dropped_chunks:
+            self.logger.warning(
+                f"Session capture hit quota ({session_id}) dropped_chunks={writer.dropped_chunks} path={writer.path}"
+            )
+        self.logger.info(f"Session capture written ({session_id}) bytes={writer.bytes_written} path={writer.path}")
+        self.enforce_quota()
+
+    def enforce_quota(self) -> None:
+        with self._lock:
+            open_paths = set(self._open_paths)
+        try:
+            entries = [
+                (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith(CAPTURE_SUFFIX)
+            ]
+        except OSError:
+            return
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        files = len(entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path in open_paths:
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                self.logger.warning(f"Could not evict session capture {path}: {e}")
+                continue
+            total -= size
+            files -= 1
+            with self._lock:
+                self.evicted += 1
+            self.logger.info(f"Session capture evicted (quota) path={path} bytes={size}")
+
+        with self._lock:
+            self.total_bytes = total
+            self.files = files
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "files": self.files,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "evicted": self.evicted,
+                "open": len(self._open_paths),
+            }
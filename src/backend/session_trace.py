@@ -0,0 +1,125 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+# Disabled tracing costs one attribute lookup and a no-op context manager per span.
+class NullTrace:
+    enabled = False
+
+    def span(self, name: str, **args) -> _NullSpan:
+        return _NULL_SPAN
+
+    def add(self, name: str, start: float, duration_s: float, **args) -> None:
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+class _Span:
+    __slots__ = ("trace", "name", "args", "start")
+
+    def __init__(self, trace: "SessionTrace", name: str, args: Dict[str, object]):
+        self.trace = trace
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.trace.add(self.name, self.start, time.perf_counter() - self.start, **self.args)
+        return False
+
+
+# Chrome trace-event ("X" complete events) recorder for one stream session.
+# Open the written JSON in chrome://tracing or https://ui.perfetto.dev.
+class SessionTrace:
+    enabled = True
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self._events: List[Dict[str, object]] = []
+        self._thread_names: Dict[int, str] = {}
+
+    def span(self, name: str, **args) -> _Span:
+        return _Span(self, name, args)
+
+    def add(self, name: str, start: float, duration_s: float, **args) -> None:
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        self._events.append({
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": round((start - self._origin) * 1e6, 1),
+            "dur": round(duration_s * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": args,
+        })
+
+    def to_chrome_trace(self) -> Dict[str, object]:
+        pid = os.getpid()
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"whisper-puma session {self.session_id}"}}
+        ]
+        metadata.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._thread_names.items())
+        )
+        return {
+            "traceEvents": metadata + list(self._events),
+            "displayTimeUnit": "ms",
+            "otherData": {"session_id": self.session_id, "started_at": self.started_at},
+        }
+
+    def write(self, directory: str) -> Optional[str]:
+        os.makedirs(directory, exist_ok=True)
+        safe_id = re.sub(r"[^A-Za-z0-9._-]", "_", self.session_id)[:80] or "session"
+        path = os.path.join(directory, f"{safe_id}.trace.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+
+def prune_traces(directory: str, keep: int) -> int:
+    # Traces are debug artifacts: keep the newest `keep` files and delete the rest, oldest first.
+    try:
+        entries = sorted(
+            (entry.stat().st_mtime, entry.path)
+            for entry in os.scandir(directory)
+            if entry.is_file() and entry.name.endswith(".trace.json")
+        )
+    except OSError:
+        return 0
+    removed = 0
+    for _, path in entries[: max(0, len(entries) - keep)]:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            continue
+    return removed
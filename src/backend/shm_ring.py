@@ -0,0 +1,85 @@
+from multiprocessing import shared_memory
+from typing import List
+
+
+# PCM16 ring buffer in a named shared-memory segment. The client owns the segment
+# and writes audio into it; only absolute byte offsets (bytes written since session
+# start) travel over the socket, so the position in the segment is offset % size.
+class SharedAudioRing:
+    def __init__(self, shm: shared_memory.SharedMemory, size: int, owner: bool):
+        self._shm = shm
+        self.size = size
+        self.owner = owner
+        self.write_offset = 0
+
+    @classmethod
+    def attach(cls, name: str, size: int = 0) -> "SharedAudioRing":
+        shm = cls._open(name)
+        usable = shm.size if size <= 0 else min(int(size), shm.size)
+        usable &= ~1
+        if usable <= 0:
+            shm.close()
+            raise ValueError(f"shared audio ring {name} has no usable capacity")
+        return cls(shm, usable, owner=False)
+
+    @classmethod
+    def create(cls, size: int, name: str = None) -> "SharedAudioRing":
+        size = max(2, int(size) & ~1)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        return cls(shm, size, owner=True)
+
+    @staticmethod
+    def _open(name: str) -> shared_memory.SharedMemory:
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13 always registers with the resource tracker, which would
+            # unlink the client's segment when the daemon exits.
+            shm = shared_memory.SharedMemory(name=name)
+            try:
+                from multiprocessing import resource_tracker
+
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+            return shm
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def read_views(self, start: int, end: int) -> List[memoryview]:
+        count = end - start
+        if count <= 0:
+            return []
+        pos = start % self.size
+        first = min(count, self.size - pos)
+        views = [self._shm.buf[pos:pos + first]]
+        if count > first:
+            views.append(self._shm.buf[0:count - first])
+        return views
+
+    def write(self, data: bytes) -> int:
+        data = memoryview(data).cast("B")
+        if len(data) > self.size:
+            self.write_offset += len(data) - self.size
+            data = data[-self.size:]
+        pos = self.write_offset % self.size
+        first = min(len(data), self.size - pos)
+        self._shm.buf[pos:pos + first] = data[:first]
+        if len(data) > first:
+            self._shm.buf[0:len(data) - first] = data[first:]
+        self.write_offset += len(data)
+        return self.write_offset
+
+    def close(self) -> None:
+        try:
+            self._shm.close()
+        except BufferError:
+            # A numpy view still references the segment; the mapping is released with it.
+            pass
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass